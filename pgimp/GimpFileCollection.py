@@ -4,6 +4,7 @@
 
 import os
 import textwrap
+from concurrent.futures import ThreadPoolExecutor
 from enum import Enum
 from glob import glob
 from typing import List, Callable, Union, Dict
@@ -33,6 +34,12 @@ class MissingFilesException(GimpException):
     """
 
 
+class GimpScriptResultNotCombinableException(GimpException):
+    """
+    Indicates that the results of a script executed by several workers cannot be combined.
+    """
+
+
 class MaskForegroundColor(Enum):
     WHITE = 1
     BLACK = 0
@@ -218,7 +225,12 @@ class GimpFileCollection:
             """
         ).format(escape_single_quotes(layer_name)), timeout_in_seconds=timeout_in_seconds)
 
-    def find_files_by_script(self, script_predicate: str, timeout_in_seconds: float = None) -> List[str]:
+    def find_files_by_script(
+            self,
+            script_predicate: str,
+            timeout_in_seconds: float = None,
+            workers: int = 1
+    ) -> List[str]:
         """
         Find files matching certain criteria by executing a gimp script.
 
@@ -287,19 +299,23 @@ class GimpFileCollection:
 
         :param script_predicate: Script to be executed.
         :param timeout_in_seconds: Script execution timeout in seconds.
+        :param workers: Number of gimp processes that concurrently execute the script. A script that takes the
+                        whole list of files is executed once per worker on a share of the files and must return
+                        a list, the lists are concatenated.
         :return: List of files matching the criteria.
         """
         if "open_xcf('__file__')" in script_predicate and "return_bool(" in script_predicate:
-            return list(filter(lambda file: self._gsr.execute_and_parse_bool(
+            matches = self._execute_per_file(lambda gsr, file: gsr.execute_and_parse_bool(
                 script_predicate.replace('__file__', escape_single_quotes(file)),
                 timeout_in_seconds=timeout_in_seconds
-            ), self._files))
+            ), workers)
+            return [file for file, match in zip(self._files, matches) if match]
         if "get_json('__files__')" in script_predicate and "return_json(" in script_predicate:
-            return self._gsr.execute_and_parse_json(
+            return self._execute_per_shard(lambda gsr, files: gsr.execute_and_parse_json(
                 script_predicate,
-                parameters={'__files__': self._files},
+                parameters={'__files__': files},
                 timeout_in_seconds=timeout_in_seconds
-            )
+            ), workers)
         raise GimpMissingRequiredParameterException(
             'Either an image file must be opened with open_xcf(\'__file__\') ' +
             'and the result is returned with return_bool() ' +
@@ -311,7 +327,8 @@ class GimpFileCollection:
             self,
             script: str,
             parameters: dict = None,
-            timeout_in_seconds: float = None
+            timeout_in_seconds: float = None,
+            workers: int = 1
     ) -> Union[JsonType, Dict[str, JsonType]]:
         """
         Execute a gimp script on the collection.
@@ -413,22 +430,26 @@ class GimpFileCollection:
         :param script: Script to be executed on the files.
         :param parameters: Parameters to pass to the script.
         :param timeout_in_seconds:  Script execution timeout in seconds.
+        :param workers: Number of gimp processes that concurrently execute the script. A script that takes the
+                        whole list of files is executed once per worker on a share of the files and must return
+                        a list or a dictionary, the results are concatenated or merged.
         :return: Dictionary of filenames and results if the script reads a single file.
                  Json if the script takes the whole list of files.
         """
         parameters = parameters or {}
         if "open_xcf('__file__')" in script and "return_json(" in script:
-            return {file: self._gsr.execute_and_parse_json(
+            results = self._execute_per_file(lambda gsr, file: gsr.execute_and_parse_json(
                 script.replace('__file__', escape_single_quotes(file)),
                 parameters=parameters,
                 timeout_in_seconds=timeout_in_seconds
-            ) for file in self._files}
+            ), workers)
+            return dict(zip(self._files, results))
         elif ("get_json('__files__')" in script or "for_each_file(" in script) and "return_json(" in script:
-            return self._gsr.execute_and_parse_json(
+            return self._execute_per_shard(lambda gsr, files: gsr.execute_and_parse_json(
                 script,
-                parameters={**parameters, '__files__': self._files},
+                parameters={**parameters, '__files__': files},
                 timeout_in_seconds=timeout_in_seconds
-            )
+            ), workers)
         else:
             raise GimpMissingRequiredParameterException(
                 'Either an image file must be opened with open_xcf(\'__file__\') ' +
@@ -599,6 +620,8 @@ class GimpFileCollection:
         script = textwrap.dedent(
             """
             import os
+            import gimpenums
+            import numpy as np
             from pgimp.gimp.file import XcfFile
             from pgimp.gimp.parameter import get_json, get_string, get_int, return_json
             from pgimp.gimp.layer import merge_mask_layer
@@ -609,6 +632,7 @@ class GimpFileCollection:
             layer_position = get_int('layer_position')
             mask_foreground_color = get_int('mask_foreground_color')
             files = get_json('__files__')
+            out = None  # reused as long as the masks have the same size
 
             for file in files:
                 file = file[len(prefix_in_this_collection):]
@@ -617,13 +641,17 @@ class GimpFileCollection:
                 if not os.path.exists(file_src):
                     continue
                 with XcfFile(file_src) as image_src, XcfFile(file_dst, save=True) as image_dst:
+                    shape = (image_dst.height, image_dst.width, 3 if image_dst.base_type == gimpenums.RGB else 1)
+                    if out is None or out.shape != shape:
+                        out = np.empty(shape, dtype=np.uint8)
                     merge_mask_layer(
                         image_src,
                         layer_name,
                         image_dst,
                         layer_name,
                         mask_foreground_color,
-                        layer_position
+                        layer_position,
+                        out=out
                     )
 
             return_json(None)
@@ -730,6 +758,71 @@ class GimpFileCollection:
             timeout_in_seconds=timeout_in_seconds
         )
 
+    def _execute_per_file(
+            self,
+            execute: Callable[[GimpScriptRunner, str], JsonType],
+            workers: int
+    ) -> List[JsonType]:
+        """
+        Executes a script once per file. With more than one worker, the files are split into shards that are
+        executed concurrently.
+        """
+        if workers == 1 or len(self._files) <= 1:
+            self._check_workers(workers)
+            return [execute(self._gsr, file) for file in self._files]
+        results = []
+        for shard_results in self._execute_in_shards(
+                lambda gsr, files: [execute(gsr, file) for file in files], workers
+        ):
+            results.extend(shard_results)
+        return results
+
+    def _execute_per_shard(
+            self,
+            execute: Callable[[GimpScriptRunner, List[str]], JsonType],
+            workers: int
+    ) -> JsonType:
+        """
+        Executes a script that takes a list of files once per shard of files and combines the results.
+        """
+        if workers == 1 or len(self._files) <= 1:
+            self._check_workers(workers)
+            return execute(self._gsr, self._files)
+        results = self._execute_in_shards(execute, workers)
+        if all(isinstance(result, list) for result in results):
+            return [item for result in results for item in result]
+        if all(isinstance(result, dict) for result in results):
+            return {key: value for result in results for key, value in result.items()}
+        raise GimpScriptResultNotCombinableException(
+            'The results of a script executed by several workers must all be lists or all be dictionaries.'
+        )
+
+    def _execute_in_shards(
+            self,
+            execute: Callable[[GimpScriptRunner, List[str]], JsonType],
+            workers: int
+    ) -> List[JsonType]:
+        """
+        Splits the files into as many shards as there are workers. Each shard is executed by its own persistent
+        gimp process which deletes the images opened by a script once it ends, just like a gimp process that quits
+        after a script. Threads suffice to drive the processes since they only wait for gimp.
+        """
+        self._check_workers(workers)
+        shard_size = -(-len(self._files) // workers)
+        shards = [self._files[i:i + shard_size] for i in range(0, len(self._files), shard_size)]
+
+        def execute_shard(files: List[str]) -> JsonType:
+            with GimpScriptRunner(persistent=True, keep_images=False) as gsr:
+                return execute(gsr, files)
+
+        with ThreadPoolExecutor(max_workers=len(shards)) as executor:
+            return list(executor.map(execute_shard, shards))
+
+    @staticmethod
+    def _check_workers(workers: int):
+        if workers < 1:
+            raise ValueError('At least one worker is required, got {:d}.'.format(workers))
+
     @classmethod
     def create_from_pathname(cls, pathname: str):
         """
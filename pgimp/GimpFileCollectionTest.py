@@ -281,6 +281,61 @@ def test_execute_script_and_return_json_with_script_that_takes_single_file():
         } == files
 
 
+def test_execute_script_and_return_json_with_script_that_takes_single_file_using_multiple_workers():
+    with TemporaryDirectory('_files') as tmpdir:
+        files = [os.path.join(tmpdir, 'file{:d}.xcf'.format(i)) for i in range(0, 4)]
+        for i, f in enumerate(files):
+            GimpFile(f).create('Layer{:d}'.format(i), np.zeros(shape=(1, 1), dtype=np.uint8))
+
+        collection = GimpFileCollection(files)
+
+        script = textwrap.dedent(
+            """
+            from pgimp.gimp.file import open_xcf
+            from pgimp.gimp.parameter import return_json
+            image = open_xcf('__file__')
+            return_json(image.layers[0].name)
+            """
+        )
+
+        result = collection.execute_script_and_return_json(script, timeout_in_seconds=10, workers=2)
+        assert {f: 'Layer{:d}'.format(i) for i, f in enumerate(files)} == result
+
+
+def test_execute_script_and_return_json_with_script_that_takes_multiple_files_using_multiple_workers():
+    with TemporaryDirectory('_files') as tmpdir:
+        files = [os.path.join(tmpdir, 'file{:d}.xcf'.format(i)) for i in range(0, 4)]
+        for i, f in enumerate(files):
+            GimpFile(f).create('Layer{:d}'.format(i), np.zeros(shape=(1, 1), dtype=np.uint8))
+
+        collection = GimpFileCollection(files)
+
+        script = textwrap.dedent(
+            """
+            from pgimp.gimp.file import for_each_file
+            from pgimp.gimp.parameter import return_json
+
+            names = {}
+
+            def layer_name(image, file):
+                names[file] = image.layers[0].name
+
+            for_each_file(layer_name)
+            return_json(names)
+            """
+        )
+
+        result = collection.execute_script_and_return_json(script, timeout_in_seconds=10, workers=3)
+        assert {f: 'Layer{:d}'.format(i) for i, f in enumerate(files)} == result
+
+
+def test_execute_script_and_return_json_requires_a_worker():
+    collection = GimpFileCollection(['file.xcf'])
+
+    with pytest.raises(ValueError):
+        collection.execute_script_and_return_json("open_xcf('__file__'); return_json(1)", workers=0)
+
+
 def test_execute_script_and_return_json_with_script_that_takes_multiple_files_using_open():
     with TempFile('.xcf') as with_white, TempFile('.xcf') as without_white:
         GimpFile(with_white)\
@@ -4,13 +4,19 @@
 
 import json
 import os
+import select
+import selectors
 import shutil
+import signal
+import struct
 import subprocess
 import sys
+import threading
 import time
+from contextlib import ExitStack
 from glob import glob
 from json import JSONDecodeError
-from typing import Dict, Union
+from typing import Dict, List, Tuple, Union
 
 import pgimp
 from pgimp.GimpException import GimpException
@@ -18,9 +24,14 @@ from pgimp.util import file
 from pgimp.util.TempFile import TempFile
 from pgimp.util.file import read
 
-if pgimp.execute_scripts_with_process_check:
+PROCESS_CHECK = pgimp.execute_scripts_with_process_check
+"""
+The flag is bound once on import, as documented it must not be changed afterwards.
+"""
+if PROCESS_CHECK:
     import psutil
 
+EXECUTABLE_XVFB_PATH = None
 EXECUTABLE_XVFB = 'xvfb-run'
 FLAG_AUTO_SERVERNUM = '--auto-servernum'
 
@@ -32,11 +43,47 @@ FLAG_NO_DATA = '-d'
 FLAG_NO_FONTS = '-f'
 FLAG_NON_INTERACTIVE = '-b'
 FLAG_FROM_STDIN = '-'
+GIMP_FLAGS = (
+    FLAG_NO_INTERFACE,
+    FLAG_NO_DATA,
+    FLAG_NO_FONTS,
+    FLAG_PYTHON_INTERPRETER,
+    FLAG_NON_INTERACTIVE,
+    FLAG_FROM_STDIN,
+)
+
+GIMP_COMMAND = None
+
+SCRIPT_PROLOGUE = None
+SCRIPT_EPILOGUE = b'\npdb.gimp_quit(0)'
+WORKER_SCRIPT = b'from pgimp.gimp.worker import serve\nserve(globals())'
+WORKER_FRAME_HEADER = struct.Struct('>I')
+WORKER_START_LOCK = threading.Lock()
+"""
+Workers are started one at a time, as xvfb-run --auto-servernum may pick the same display number for
+instances that start at the same moment.
+"""
 
 CHILD_PROCESS_START_TIMEOUT = 10
+PROC_CHILDREN_PRESENT = None
+STDIN_CHUNK_SIZE = 64 * 1024
 
 PYTHON2_PYTHONPATH = None
 
+# compact separators keep the parameter file small
+JSON_PARAMETER_ENCODER = json.JSONEncoder(separators=(',', ':'))
+
+# looked up by exact type, bytes are passed by file
+PARAMETER_ENCODERS = {
+    str: str,
+    bool: repr,
+    int: repr,
+    float: repr,
+    list: JSON_PARAMETER_ENCODER.encode,
+    tuple: JSON_PARAMETER_ENCODER.encode,
+    dict: JSON_PARAMETER_ENCODER.encode,
+}
+
 JsonType = Union[None, bool, int, float, str, list, dict]
 
 
@@ -103,13 +150,83 @@ def is_gimp_present():
 
 
 def path_to_xvfb_run():
-    return shutil.which(EXECUTABLE_XVFB)
+    global EXECUTABLE_XVFB_PATH
+
+    if EXECUTABLE_XVFB_PATH is None:
+        EXECUTABLE_XVFB_PATH = shutil.which(EXECUTABLE_XVFB)
+
+    return EXECUTABLE_XVFB_PATH
 
 
 def is_xvfb_present():
     return path_to_xvfb_run() is not None
 
 
+def gimp_command():
+    """
+    The command line used to launch gimp. It only depends on the installed executables
+    and is therefore built once per process.
+    """
+    global GIMP_COMMAND
+    if GIMP_COMMAND is None:
+        command = []
+        if is_xvfb_present():
+            command.append(path_to_xvfb_run())
+            command.append(FLAG_AUTO_SERVERNUM)  # workaround for defunct xvfb-run processes on ubuntu 16.04
+        command.append(path_to_gimp_executable())
+        command.extend(GIMP_FLAGS)
+        GIMP_COMMAND = command
+    return GIMP_COMMAND
+
+
+def is_proc_children_present():
+    """
+    Whether the kernel lists the children of each thread in ``/proc/<pid>/task/<tid>/children``.
+    """
+    global PROC_CHILDREN_PRESENT
+    if PROC_CHILDREN_PRESENT is None:
+        PROC_CHILDREN_PRESENT = is_linux() and os.path.exists('/proc/self/task/{:d}/children'.format(os.getpid()))
+    return PROC_CHILDREN_PRESENT
+
+
+def descendant_pids(pid: int) -> List[int]:
+    """
+    Reads the process ids of all descendants of a process from ``/proc`` without scanning
+    the whole process table. Descendants of processes that vanish in between are lost.
+    """
+    pids = []
+    parents = [pid]
+    while parents:
+        for children_file in glob('/proc/{:d}/task/*/children'.format(parents.pop())):
+            try:
+                children = [int(child) for child in read(children_file).split()]
+            except OSError:
+                continue  # vanishing threads are ok
+            pids.extend(children)
+            parents.extend(children)
+    return pids
+
+
+def encode_parameter_subclass(value) -> str:
+    for parameter_type, encode in PARAMETER_ENCODERS.items():
+        if isinstance(value, parameter_type):
+            return encode(value)
+    raise GimpScriptException('Cannot interpret parameter type {:s}'.format(type(value).__name__))
+
+
+def script_prologue() -> bytes:
+    """
+    The code executed before each script: the initializer that sets up gimp's python interpreter and
+    the extension of the path so that pgimp can be imported. It is read and encoded once per process.
+    """
+    global SCRIPT_PROLOGUE
+    if SCRIPT_PROLOGUE is None:
+        initializer = file.get_content(file.relative_to(__file__, 'gimp/initializer.py')) + '\n'
+        extend_path = "sys.path.append('{:s}')\n".format(os.path.dirname(os.path.dirname(__file__)))
+        SCRIPT_PROLOGUE = (initializer + extend_path).encode()
+    return SCRIPT_PROLOGUE
+
+
 def python2_pythonpath():
     global PYTHON2_PYTHONPATH
     if PYTHON2_PYTHONPATH is None:
@@ -146,13 +263,39 @@ class GimpScriptRunner:
     >>> from pgimp.GimpScriptRunner import GimpScriptRunner
     >>> GimpScriptRunner().execute('print("Hello from within gimp")')
     'Hello from within gimp\\n'
+
+    The environment passed to gimp is captured from :py:data:`os.environ` when the first script is executed.
+
+    Starting gimp takes much longer than executing most scripts. A persistent runner starts gimp once
+    and executes all of its scripts in the same gimp process until it is closed:
+
+    >>> with GimpScriptRunner(persistent=True) as gsr:
+    ...     [gsr.execute('print({:d})'.format(i)) for i in range(3)]
+    ['0\\n', '1\\n', '2\\n']
+
+    Each script gets its own globals, but other state such as opened images or imported modules
+    is shared between the scripts of a persistent runner. A script that quits gimp ends the process
+    and the next script starts a new one. With ``keep_images=False`` the images that a script opened or
+    created are deleted once it ends, as if gimp had quit.
     """
-    def __init__(self, environment: Dict[str, str] = None, working_directory=os.getcwd()) -> None:
+    def __init__(
+            self,
+            environment: Dict[str, str] = None,
+            working_directory=os.getcwd(),
+            persistent: bool = False,
+            keep_images: bool = True,
+    ) -> None:
         super().__init__()
         self._gimp_process = None
         self._environment = environment or {}
         self._working_directory = working_directory
-        self._file_to_execute = None
+        self._gimp_environment = None
+        self._persistent = persistent
+        self._keep_images = keep_images
+        self._worker_requests = None
+        self._worker_responses = None
+        self._worker_processes = []
+        self._worker_files = None
 
     def execute_file(
             self,
@@ -173,18 +316,13 @@ class GimpScriptRunner:
 
         See also :py:meth:`~pgimp.GimpScriptRunner.GimpScriptRunner.execute`.
         """
-        self._file_to_execute = file
         parameters = parameters or {}
-        try:
-            result = self.execute(
-                'from pgimp.gimp.parameter import get_parameter;'
-                'exec(open(get_parameter("__script_file__")).read(), globals())',
-                {**parameters, '__script_file__': file},
-                timeout_in_seconds,
-            )
-            return result
-        finally:
-            self._file_to_execute = None
+        return self.execute(
+            'from pgimp.gimp.parameter import get_parameter; from pgimp.gimp.worker import execute_file;'
+            'execute_file(get_parameter("__script_file__"), globals())',
+            {**parameters, '__script_file__': file},
+            timeout_in_seconds,
+        )
 
     def execute_and_parse_json(
             self,
@@ -205,10 +343,11 @@ class GimpScriptRunner:
 
         See also :py:meth:`~pgimp.GimpScriptRunner.GimpScriptRunner.execute`.
         """
-        result = self.execute(
+        result = self._send_to_gimp(
             string,
+            timeout_in_seconds,
+            binary=True,  # json is parsed from bytes directly, which saves decoding the whole output
             parameters=parameters,
-            timeout_in_seconds=timeout_in_seconds,
         )
         return self._parse(result)
 
@@ -231,10 +370,11 @@ class GimpScriptRunner:
 
         See also :py:meth:`~pgimp.GimpScriptRunner.GimpScriptRunner.execute`.
         """
-        result = self.execute(
+        result = self._send_to_gimp(
             string,
+            timeout_in_seconds,
+            binary=True,  # json is parsed from bytes directly, which saves decoding the whole output
             parameters=parameters,
-            timeout_in_seconds=timeout_in_seconds,
         )
         return self._parse(result)
 
@@ -277,6 +417,7 @@ class GimpScriptRunner:
             string: str,
             parameters: Dict[str, Union[bool, int, float, str, bytes, list, tuple, dict]] = None,
             timeout_in_seconds: float = None,
+            discard_output: bool = False,
     ) -> Union[str, None]:
         """
         Execute a given piece of code within gimp's python interpreter.
@@ -289,148 +430,398 @@ class GimpScriptRunner:
 
         :param string: The code to be executed as string.
         :param parameters: Parameter names and values. Supported types will be encoded as string,
-                           be passed to the script and be decoded there.
+                           be passed to the script and be decoded there. Bytes are passed by temporary file.
         :param timeout_in_seconds: How long to wait for completion in seconds until a
                                    :py:class:`~pgimp.GimpScriptRunner.GimpScriptExecutionTimeoutException` is thrown.
+        :param discard_output: Whether to discard the output of the script instead of buffering and returning it.
         :return: The output produced by the script if no output stream is defined.
         """
         return self._send_to_gimp(
             string,
             timeout_in_seconds,
             parameters=parameters,
+            discard_output=discard_output,
         )
 
+    def execute_many(
+            self,
+            scripts: List[Tuple[str, Union[dict, None]]],
+            timeout_in_seconds: float = None,
+    ) -> List[Union[str, None]]:
+        """
+        Execute several pieces of code one after another within the same gimp process, so that gimp
+        is only started once. Execution stops at the first script that fails.
+
+        Example:
+
+        >>> from pgimp.GimpScriptRunner import GimpScriptRunner
+        >>> GimpScriptRunner().execute_many([
+        ...     ('from pgimp.gimp.parameter import get_int; print(get_int("i") + 1)', {'i': i}) for i in range(3)
+        ... ])
+        ['1\\n', '2\\n', '3\\n']
+
+        See also :py:meth:`~pgimp.GimpScriptRunner.GimpScriptRunner.execute`.
+
+        :param scripts: The code to be executed and its parameters.
+        :param timeout_in_seconds: How long to wait for the completion of each script.
+        :return: The output produced by each script.
+        """
+        persistent = self._persistent
+        self._persistent = True
+        try:
+            return [self.execute(string, parameters, timeout_in_seconds) for string, parameters in scripts]
+        finally:
+            self._persistent = persistent
+            if not persistent:
+                self.close()
+
     def _send_to_gimp(
             self,
             code: str,
             timeout_in_seconds: float = None,
             binary=False,
             parameters: dict = None,
+            discard_output=False,
     ) -> Union[str, bytes, None]:
 
         if not is_gimp_present():
             raise GimpNotInstalledException('A working gimp installation with gimp on the PATH is necessary.')
 
-        command = []
-        if is_xvfb_present():
-            command.append(path_to_xvfb_run())
-            command.append(FLAG_AUTO_SERVERNUM)  # workaround for defunct xvfb-run processes on ubuntu 16.04
-        command.append(path_to_gimp_executable())
-        command.extend([
-            FLAG_NO_INTERFACE,
-            FLAG_NO_DATA,
-            FLAG_NO_FONTS,
-            FLAG_PYTHON_INTERPRETER,
-            FLAG_NON_INTERACTIVE,
-            FLAG_FROM_STDIN
-        ])
-
-        gimp_environment = {'__working_directory__': self._working_directory}
-        gimp_environment.update(os.environ.copy())
-        if 'PYTHONPATH' not in gimp_environment:
-            gimp_environment['__PYTHONPATH__'] = python2_pythonpath()
-        else:
-            gimp_environment['__PYTHONPATH__'] = python2_pythonpath() + ':' + gimp_environment['PYTHONPATH']
-        gimp_environment.update({k: v for k, v in self._environment.items() if self._environment[k] is not None})
-
-        parameters = parameters or {}
-        parameters_parsed = {}
-        for parameter, value in parameters.items():
-            if isinstance(value, str):
-                parameters_parsed[parameter] = value
-            elif isinstance(value, (bool, int, float, bytes)):
-                parameters_parsed[parameter] = repr(value)
-            elif isinstance(value, (list, tuple, dict)):
-                parameters_parsed[parameter] = json.dumps(value)
+        deadline = None if timeout_in_seconds is None else time.monotonic() + timeout_in_seconds
+
+        with TempFile('.stdout', 'pgimp') as stdout_file, TempFile('.stderr', 'pgimp') as stderr_file, \
+                ExitStack() as parameter_files:
+            script_environment = {}
+            if parameters:
+                # parameters are passed by file as the environment is limited in size
+                encoded_parameters = {}
+                for parameter, value in parameters.items():
+                    encode = PARAMETER_ENCODERS.get(type(value))
+                    if encode is not None:
+                        encoded_parameters[parameter] = encode(value)
+                    elif isinstance(value, bytes):
+                        # bytes, which may be large, are passed by a file of their own without encoding
+                        bytes_file = parameter_files.enter_context(TempFile('.bytes', 'pgimp', size=len(value)))
+                        with open(bytes_file, 'r+b') as file_handle:  # 'wb' would truncate the allocated file
+                            file_handle.write(value)
+                        encoded_parameters[parameter] = bytes_file
+                    else:
+                        encoded_parameters[parameter] = encode_parameter_subclass(value)
+                parameter_file = parameter_files.enter_context(TempFile('.json', 'pgimp'))
+                with open(parameter_file, 'w') as file_handle:
+                    file_handle.write(JSON_PARAMETER_ENCODER.encode(encoded_parameters))
+                script_environment['__parameters__'] = parameter_file
+
+            script_environment['__stdout__'] = stdout_file if not discard_output else os.devnull
+            script_environment['__stderr__'] = stderr_file
+            script_environment['__binary__'] = str(binary)
+
+            if self._persistent:
+                self._execute_in_worker(code, script_environment, deadline, timeout_in_seconds)
             else:
-                raise GimpScriptException('Cannot interpret parameter type {:s}'.format(type(value).__name__))
+                self._execute_in_new_gimp(code, script_environment, deadline, timeout_in_seconds)
 
-        gimp_environment.update({k: v for k, v in parameters_parsed.items() if parameters_parsed[k] is not None})
+            stderr_content = read(stderr_file, 'r')
+            if not stderr_content:
+                return read(stdout_file, 'r' if not binary else 'rb') if not discard_output else None
+
+        # the output of a failed script, which may be large binary data, is never read
+        stderr_content = stderr_content.strip()
+        # only the last line can hold the marker, so there is no need to split the whole output into lines
+        last_line_start = stderr_content.rfind('\n') + 1
+        if stderr_content.startswith('__GIMP_SCRIPT_ERROR__', last_line_start):
+            raise GimpScriptException(stderr_content[:last_line_start])
+        raise GimpScriptException(stderr_content)
+
+    def _execute_in_new_gimp(
+            self,
+            code: str,
+            script_environment: Dict[str, str],
+            deadline: Union[float, None],
+            timeout_in_seconds: Union[float, None],
+    ):
+        gimp_environment = self._get_gimp_environment().copy()
+        gimp_environment.update(script_environment)
+
+        if PROCESS_CHECK:
+            # the initializer signals through this pipe once gimp and its plug-ins are running
+            ready_read, ready_write = os.pipe()
+            gimp_environment['__ready_fd__'] = str(ready_write)
+
+        try:
+            self._gimp_process = self._start_gimp(
+                gimp_environment,
+                (ready_write,) if PROCESS_CHECK else (),
+            )
+        except BaseException:
+            if PROCESS_CHECK:
+                os.close(ready_read)
+            raise
+        finally:
+            if PROCESS_CHECK:
+                os.close(ready_write)
 
-        with TempFile('.stdout', 'pgimp') as stdout_file, TempFile('.stderr', 'pgimp') as stderr_file:
-            gimp_environment['__stdout__'] = stdout_file
-            gimp_environment['__stderr__'] = stderr_file
-            gimp_environment['__binary__'] = str(binary)
+        script = b''.join((script_prologue(), code.encode(), SCRIPT_EPILOGUE))
 
-            self._gimp_process = subprocess.Popen(
-                command,
-                stdin=subprocess.PIPE,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                env=gimp_environment,
+        process_children = []
+        try:
+            try:
+                self._write_script(script, deadline)
+            except BrokenPipeError:
+                pass  # gimp terminated early, the script's stderr will tell why
+
+            if PROCESS_CHECK:
+                start_timeout = CHILD_PROCESS_START_TIMEOUT
+                if deadline is not None:
+                    start_timeout = min(start_timeout, self._remaining(deadline))
+                process_children = self._wait_for_child_processes_to_start(ready_read, start_timeout)
+
+            self._gimp_process.wait(timeout=self._remaining(deadline))
+        except subprocess.TimeoutExpired as exception:
+            if PROCESS_CHECK:
+                process_children.extend(self._child_processes())
+            self._kill_gimp()
+            raise GimpScriptExecutionTimeoutException(
+                str(subprocess.TimeoutExpired(exception.cmd, timeout_in_seconds)) +
+                '\nCode that was executed:\n' + script.decode()
             )
+        finally:
+            if PROCESS_CHECK:
+                os.close(ready_read)
+                self._kill_non_terminated_processes(process_children)
 
-            initializer = file.get_content(file.relative_to(__file__, 'gimp/initializer.py')) + '\n'
-            extend_path = "sys.path.append('{:s}')\n".format(os.path.dirname(os.path.dirname(__file__)))
-            quit_gimp = '\npdb.gimp_quit(0)'
+    def _execute_in_worker(
+            self,
+            code: str,
+            script_environment: Dict[str, str],
+            deadline: Union[float, None],
+            timeout_in_seconds: Union[float, None],
+    ):
+        try:
+            if self._worker_requests is None:
+                self._start_worker(deadline)
+
+            request = json.dumps({
+                'code': code,
+                'environment': script_environment,
+                'keep_images': self._keep_images,
+            }).encode()
+            self._write_to_worker(WORKER_FRAME_HEADER.pack(len(request)) + request, deadline)
+            worker_running = self._read_from_worker(deadline)
+        except subprocess.TimeoutExpired as exception:
+            self._stop_worker(kill=True)
+            raise GimpScriptExecutionTimeoutException(
+                str(subprocess.TimeoutExpired(exception.cmd, timeout_in_seconds)) +
+                '\nCode that was executed:\n' + code
+            )
+        except BrokenPipeError:
+            self._stop_worker(kill=True)
+            raise GimpScriptException('The gimp worker terminated unexpectedly.')
 
-            code = initializer + extend_path + code + quit_gimp
+        if not worker_running:
+            # the script quit gimp, the next one will start a new worker
+            self._stop_worker(kill=True)
 
-            if pgimp.execute_scripts_with_process_check:
-                import psutil
+    def _start_worker(self, deadline: Union[float, None]):
+        with WORKER_START_LOCK:
+            self._start_worker_process(deadline)
 
-                if is_xvfb_present():
-                    expected_processes = {'xvfb', 'gimp', 'script-fu', 'python'}
-                else:
-                    expected_processes = {'script-fu', 'python'}
+    def _start_worker_process(self, deadline: Union[float, None]):
+        worker_files = ExitStack()
+        requests_read, requests_write = os.pipe()
+        responses_read, responses_write = os.pipe()
 
-                process = psutil.Process(self._gimp_process.pid)
-                process_children = self._wait_for_child_processes_to_start(process, expected_processes)
+        try:
+            gimp_environment = self._get_gimp_environment().copy()
+            gimp_environment['__stdout__'] = worker_files.enter_context(TempFile('.stdout', 'pgimp'))
+            gimp_environment['__stderr__'] = worker_files.enter_context(TempFile('.stderr', 'pgimp'))
+            gimp_environment['__binary__'] = str(False)
+            gimp_environment['__worker_requests__'] = str(requests_read)
+            gimp_environment['__worker_responses__'] = str(responses_write)
+            self._gimp_process = self._start_gimp(gimp_environment, (requests_read, responses_write))
+        except BaseException:
+            os.close(requests_write)
+            os.close(responses_read)
+            worker_files.close()
+            raise
+        finally:
+            os.close(requests_read)
+            os.close(responses_write)
 
+        # from here on the worker is stopped like any other, which also kills gimp should it not become ready
+        self._worker_requests = requests_write
+        self._worker_responses = responses_read
+        self._worker_files = worker_files
+        try:
             try:
-                self._gimp_process.communicate(code.encode(), timeout=timeout_in_seconds)
-            except subprocess.TimeoutExpired as exception:
-                self._gimp_process.kill()
-                raise GimpScriptExecutionTimeoutException(str(exception) + '\nCode that was executed:\n' + code)
-            finally:
-                if pgimp.execute_scripts_with_process_check:
-                    self._kill_non_terminated_processes(process_children)
-
-            stdout_content = read(stdout_file, 'r' if not binary else 'rb')
-            stderr_content = read(stderr_file, 'r')
+                self._write_script(b''.join((script_prologue(), WORKER_SCRIPT, SCRIPT_EPILOGUE)), deadline)
+            except BrokenPipeError:
+                pass  # gimp terminated early, its stderr will tell why
+            if not self._read_from_worker(deadline):
+                stderr_content = read(gimp_environment['__stderr__'], 'r')
+                raise GimpScriptException('The gimp worker could not be started:\n' + stderr_content)
+            if PROCESS_CHECK:
+                self._worker_processes = self._child_processes()
+        except BaseException:
+            self._stop_worker(kill=True)
+            raise
+
+    def _stop_worker(self, kill: bool = False):
+        if self._worker_requests is None:
+            return
+        os.close(self._worker_requests)  # lets the worker quit gimp once it has read all requests
+        os.close(self._worker_responses)
+        self._worker_requests = None
+        self._worker_responses = None
+
+        if PROCESS_CHECK:
+            self._worker_processes.extend(self._child_processes())
+        try:
+            if kill:
+                self._kill_gimp()
+            else:
+                self._gimp_process.wait(timeout=CHILD_PROCESS_START_TIMEOUT)
+        except subprocess.TimeoutExpired:
+            self._kill_gimp()
+        finally:
+            if PROCESS_CHECK:
+                self._kill_non_terminated_processes(self._worker_processes)
+            self._worker_processes = []
+            self._worker_files.close()
+
+    def _write_to_worker(self, data: bytes, deadline: Union[float, None]):
+        data = memoryview(data)
+        while data:
+            _, writable, _ = select.select([], [self._worker_requests], [], self._remaining(deadline))
+            if not writable:
+                raise subprocess.TimeoutExpired(self._gimp_process.args, self._remaining(deadline))
+            data = data[os.write(self._worker_requests, data[:STDIN_CHUNK_SIZE]):]
+
+    def _read_from_worker(self, deadline: Union[float, None]) -> bool:
+        """
+        Waits for the worker to signal that it is ready for the next script.
 
-        if stderr_content:
-            error_lines = stderr_content.strip().split('\n')
-            if error_lines[-1].startswith('__GIMP_SCRIPT_ERROR__'):
-                error_string = stderr_content.rsplit('\n', 1)[0] + '\n'
-                if self._file_to_execute:
-                    error_string = error_string.replace('File "<string>"', 'File "{:s}"'.format(self._file_to_execute), 1)
-                raise GimpScriptException(error_string)
-            raise GimpScriptException('\n'.join(error_lines))
+        :return: False if gimp terminated instead.
+        """
+        readable, _, _ = select.select([self._worker_responses], [], [], self._remaining(deadline))
+        if not readable:
+            raise subprocess.TimeoutExpired(self._gimp_process.args, self._remaining(deadline))
+        return os.read(self._worker_responses, 1) != b''
 
-        return stdout_content
+    def close(self):
+        """
+        Quits the gimp process that is kept running for a persistent runner. It is started again
+        when the next script is executed.
+        """
+        self._stop_worker()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+        return False
+
+    def _start_gimp(self, gimp_environment: Dict[str, str], pass_fds=()) -> subprocess.Popen:
+        # gimp gets its own session so that xvfb, gimp and its plug-ins can be killed as a group,
+        # only the pipes used to communicate with the script are inherited. There must be no preexec_fn,
+        # so that subprocess can start gimp by vfork or posix_spawn instead of fork, which would copy
+        # the page tables of a possibly large parent process.
+        return subprocess.Popen(
+            gimp_command(),
+            stdin=subprocess.PIPE,
+            stdout=subprocess.DEVNULL,  # the script's output is passed through __stdout__ and __stderr__
+            stderr=subprocess.DEVNULL,
+            env=gimp_environment,
+            close_fds=True,
+            pass_fds=pass_fds,
+            start_new_session=True,
+        )
 
-    def _wait_for_child_processes_to_start(self, process, expected_processes):
-        current_time = time.time()
-        process_children = []
-        children = {}
-        while children != expected_processes:
-            process_children = process.children(recursive=True)
-            children_list = []
-            for child in process_children:
-                try:
-                    children_list.append(
-                        child.name().lower() if not child.name().lower().startswith('python') else 'python'
-                    )
-                except psutil.NoSuchProcess:
-                    pass  # vanishing processes are ok
-            children = {*children_list}
-            time.sleep(0.1)
-            if time.time() - current_time > CHILD_PROCESS_START_TIMEOUT:
-                self._kill_non_terminated_processes(process_children)
-                raise GimpScriptExecutionTimeoutException(
-                    'Child processes ' + ', '.join(expected_processes) + ' were not spawned in time.')
-        return process_children
+    def _kill_gimp(self):
+        try:
+            os.killpg(self._gimp_process.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass  # the process group has already terminated
+        self._gimp_process.wait()
+
+    def _get_gimp_environment(self) -> Dict[str, str]:
+        if self._gimp_environment is None:
+            gimp_environment = {'__working_directory__': self._working_directory}
+            gimp_environment.update(os.environ)
+            if 'PYTHONPATH' not in gimp_environment:
+                gimp_environment['__PYTHONPATH__'] = python2_pythonpath()
+            else:
+                gimp_environment['__PYTHONPATH__'] = python2_pythonpath() + ':' + gimp_environment['PYTHONPATH']
+            gimp_environment.update({k: v for k, v in self._environment.items() if v is not None})
+            self._gimp_environment = gimp_environment
+        return self._gimp_environment
+
+    def _write_script(self, script: bytes, deadline: Union[float, None]):
+        """
+        Writes the script to gimp's stdin without blocking beyond the deadline, e.g. when gimp hangs during startup
+        and does not consume its input.
+        """
+        stdin = self._gimp_process.stdin
+        os.set_blocking(stdin.fileno(), False)
+        script = memoryview(script)
+        try:
+            with selectors.DefaultSelector() as selector:
+                selector.register(stdin, selectors.EVENT_WRITE)
+                while script:
+                    if not selector.select(self._remaining(deadline)):
+                        raise subprocess.TimeoutExpired(self._gimp_process.args, self._remaining(deadline))
+                    script = script[os.write(stdin.fileno(), script[:STDIN_CHUNK_SIZE]):]
+        finally:
+            stdin.close()
+
+    @staticmethod
+    def _remaining(deadline: Union[float, None]) -> Union[float, None]:
+        if deadline is None:
+            return None
+        return max(0, deadline - time.monotonic())
+
+    def _wait_for_child_processes_to_start(self, ready_fd: int, timeout: float):
+        """
+        Blocks until the initializer signals that gimp and its plug-ins are running and returns the process tree.
+        Should the signal not arrive in time, e.g. because the script could not be compiled, the process tree is
+        taken as it is.
+        """
+        readable, _, _ = select.select([ready_fd], [], [], timeout)
+        if readable:
+            os.read(ready_fd, 1)
+        return self._child_processes()
+
+    def _child_processes(self):
+        if not is_proc_children_present():
+            try:
+                return psutil.Process(self._gimp_process.pid).children(recursive=True)
+            except psutil.NoSuchProcess:
+                return []
+
+        # psutil would read the status of every process in the system to find the children
+        processes = []
+        for pid in descendant_pids(self._gimp_process.pid):
+            try:
+                processes.append(psutil.Process(pid))
+            except psutil.NoSuchProcess:
+                pass  # vanishing processes are ok
+        return processes
 
     def _kill_non_terminated_processes(self, processes):
         for process in processes:
-            if process.is_running():
-                process.kill()
+            try:
+                if process.is_running():
+                    process.kill()
+            except psutil.NoSuchProcess:
+                pass  # vanishing processes are ok
 
-    def _parse(self, input: str) -> JsonType:
+    def _parse(self, input: Union[str, bytes]) -> JsonType:
         try:
             return json.loads(input)
-        except JSONDecodeError as exc:
+        except (JSONDecodeError, UnicodeDecodeError) as exc:
+            if isinstance(input, bytes):
+                input = input.decode('utf-8', errors='replace')
             raise GimpScriptException(
                 'The following JSON could not be parsed:\n>>>' + input + '<<<\nOriginal decoding error:\n' + str(exc)
             )
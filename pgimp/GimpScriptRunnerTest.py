@@ -3,7 +3,7 @@
 # SPDX-License-Identifier: MIT
 
 import os
-from tempfile import mktemp
+import subprocess
 
 import numpy as np
 import pytest
@@ -12,35 +12,40 @@ from pgimp.GimpScriptRunner import GimpScriptRunner, GimpScriptException, GimpSc
     python2_pythonpath
 from pgimp.util import file
 
-gsr = GimpScriptRunner()
+gsr = GimpScriptRunner(persistent=True)  # shared by the tests so that gimp is only started once
 
 
-def test_execute_file():
-    tmpfile = mktemp()
-    file.append(tmpfile, 'from pgimp.gimp.parameter import get_parameter; print(get_parameter("parameter"))')
-    out = gsr.execute_file(tmpfile, parameters={'parameter': 'value'}, timeout_in_seconds=3)
+def teardown_module():
+    gsr.close()
 
-    os.remove(tmpfile)
+
+def test_execute_file(tmp_path):
+    script = tmp_path / 'script'
+    script.write_text('from pgimp.gimp.parameter import get_parameter; print(get_parameter("parameter"))')
+    out = gsr.execute_file(str(script), parameters={'parameter': 'value'}, timeout_in_seconds=3)
 
     assert 'value\n' == out
 
 
-def test_execute_file_with_runtime_exception():
-    tmpfile = mktemp(suffix='.py')
-    file.append(
-        tmpfile,
-        'from pgimp.gimp.parameter import get_parameter; print(get_parameter("parameter"))\nprint(1/0)'
-    )
+def test_execute_file_rewritten_with_same_size(tmp_path):
+    script = tmp_path / 'script'
+    for value in ('a', 'b'):
+        script.write_text('print("{:s}")'.format(value))
+        assert '{:s}\n'.format(value) == gsr.execute_file(str(script), timeout_in_seconds=3)
+
+
+def test_execute_file_with_runtime_exception(tmp_path):
+    script = tmp_path / 'script.py'
+    script.write_text('from pgimp.gimp.parameter import get_parameter; print(get_parameter("parameter"))\nprint(1/0)')
 
     with pytest.raises(GimpScriptException) as exception:
-        gsr.execute_file(tmpfile, parameters={'parameter': 'value'}, timeout_in_seconds=3)
+        gsr.execute_file(str(script), parameters={'parameter': 'value'}, timeout_in_seconds=3)
 
     original_exception = exception._excinfo[1]
     exception_lines = str(original_exception).split('\n')
 
-    os.remove(tmpfile)
-
-    assert 'File "{:s}", line 2'.format(tmpfile) in exception_lines[-3]
+    assert 'File "{:s}", line 2'.format(str(script)) in exception_lines[-4]
+    assert 'print(1/0)' in exception_lines[-3]
 
 
 def test_execute_string():
@@ -63,7 +68,7 @@ def test_pass_parameter():
 
 def test_timeout():
     with pytest.raises(GimpScriptExecutionTimeoutException):
-        gsr.execute('print(', timeout_in_seconds=3)
+        GimpScriptRunner().execute('print(', timeout_in_seconds=3)
 
 
 def test_execute_and_parse_json():
@@ -75,6 +80,13 @@ def test_execute_and_parse_json():
     assert ["a", "b", "c"] == result
 
 
+def test_execute_and_parse_json_with_invalid_output():
+    with pytest.raises(GimpScriptException) as exception:
+        gsr.execute_and_parse_json('print("{a: b}")', timeout_in_seconds=3)
+
+    assert '>>>{a: b}\n<<<' in str(exception.value)
+
+
 def test_execute_and_parse_bool():
     result = gsr.execute_and_parse_json(
         'from pgimp.gimp.parameter import return_bool; return_bool("truthy")',
@@ -100,7 +112,7 @@ def test_import_from_pgimp_library():
 
 
 def test_execute_binary():
-    arr = np.frombuffer(GimpScriptRunner().execute_binary(
+    arr = np.frombuffer(gsr.execute_binary(
         "from pgimp.gimp.parameter import *; import sys; sys.stdout.write(get_bytes('arr'))",
         parameters = {"arr": np.array([i for i in range(0, 3)], dtype=np.uint8).tobytes()}),
         dtype=np.uint8
@@ -108,21 +120,116 @@ def test_execute_binary():
     assert np.all([0, 1, 2] == arr)
 
 
+def test_execute_with_discarded_output():
+    assert gsr.execute('print("hello")', timeout_in_seconds=3, discard_output=True) is None
+
+    with pytest.raises(GimpScriptException):
+        gsr.execute('1/0', timeout_in_seconds=3, discard_output=True)
+
+
 def test_no_dangling_processes():
-    gsr.execute('print()')
-    gsr.execute('print()')
+    gsr.close()
+    one_shot_gsr = GimpScriptRunner()
+
+    one_shot_gsr.execute('print()', discard_output=True)
+    one_shot_gsr.execute('print()', discard_output=True)
 
     with pytest.raises(GimpScriptExecutionTimeoutException):
-        gsr.execute('print(', timeout_in_seconds=3)
+        one_shot_gsr.execute('print(', timeout_in_seconds=3)
 
-    open_processes = os.popen('ps -A | grep -i -e xvfb -e gimp').read().rstrip('\n').split('\n')
-    hanging_processes = filter(None, open_processes)
-    hanging_processes = filter(lambda x: '<defunct>' not in x, hanging_processes)  # defunct is ok in docker containers
-    hanging_processes = list(hanging_processes)
+    open_processes = subprocess.run(['ps', '-A'], stdout=subprocess.PIPE).stdout.decode().split('\n')
+    hanging_processes = [
+        process for process in open_processes
+        if ('xvfb' in process.lower() or 'gimp' in process.lower())
+        and '<defunct>' not in process  # defunct is ok in docker containers
+    ]
 
     print('\n'.join(hanging_processes))
     assert len(hanging_processes) == 0
 
 
+def test_persistent_runner():
+    with GimpScriptRunner(persistent=True) as persistent_gsr:
+        assert 'a\n' == persistent_gsr.execute('x = "a"; print(x)', timeout_in_seconds=20)
+        gimp_process = persistent_gsr._gimp_process
+
+        result = persistent_gsr.execute_and_parse_json(
+            'from pgimp.gimp.parameter import *; return_json([get_int("parameter"), globals().get("x")])',
+            parameters={'parameter': 1},
+            timeout_in_seconds=3
+        )
+        assert [1, None] == result
+
+        with pytest.raises(GimpScriptException):
+            persistent_gsr.execute('1/0', timeout_in_seconds=3)
+
+        assert 'b\n' == persistent_gsr.execute('print("b")', timeout_in_seconds=3)
+        assert gimp_process is persistent_gsr._gimp_process
+
+    assert gimp_process.returncode is not None
+
+
+def test_persistent_runner_restarts_gimp_after_timeout():
+    with GimpScriptRunner(persistent=True) as persistent_gsr:
+        with pytest.raises(GimpScriptExecutionTimeoutException):
+            persistent_gsr.execute('import time; time.sleep(30)', timeout_in_seconds=20)
+
+        assert 'a\n' == persistent_gsr.execute('print("a")', timeout_in_seconds=20)
+
+
+def test_persistent_runner_deletes_images_unless_they_are_kept():
+    script = 'import gimp\n' \
+             'from pgimp.gimp.parameter import return_json\n' \
+             'pdb.gimp_image_new(1, 1, 0)\n' \
+             'return_json(len(gimp.image_list()))'
+
+    with GimpScriptRunner(persistent=True) as persistent_gsr:
+        assert [1, 2] == [persistent_gsr.execute_and_parse_json(script, timeout_in_seconds=20) for _ in range(2)]
+
+    with GimpScriptRunner(persistent=True, keep_images=False) as persistent_gsr:
+        assert [1, 1] == [persistent_gsr.execute_and_parse_json(script, timeout_in_seconds=20) for _ in range(2)]
+
+
+@pytest.mark.parametrize("persistent", [False, True])
+def test_failed_gimp_start_leaves_no_state_behind(persistent):
+    failing_gsr = GimpScriptRunner(persistent=persistent)
+    start_gimp = failing_gsr._start_gimp
+
+    def fail_to_start_gimp(*args):
+        raise OSError('gimp could not be started')
+
+    open_fds = _open_file_descriptors()
+    failing_gsr._start_gimp = fail_to_start_gimp
+    with pytest.raises(OSError):
+        failing_gsr.execute('print("a")', timeout_in_seconds=20)
+
+    assert open_fds == _open_file_descriptors()
+    assert failing_gsr._worker_requests is None
+
+    failing_gsr._start_gimp = start_gimp
+    assert 'a\n' == failing_gsr.execute('print("a")', timeout_in_seconds=20)
+    failing_gsr.close()
+
+
+def _open_file_descriptors():
+    if not os.path.exists('/proc/self/fd'):
+        return None
+    return sorted(os.listdir('/proc/self/fd'))
+
+
+def test_execute_many():
+    one_shot_gsr = GimpScriptRunner()
+    result = one_shot_gsr.execute_many(
+        [
+            ('print("a")', None),
+            ('from pgimp.gimp.parameter import return_json, get_json; return_json(get_json("p"))', {'p': [1]}),
+        ],
+        timeout_in_seconds=20
+    )
+
+    assert ['a\n', '[1]'] == result
+    assert one_shot_gsr._gimp_process.returncode is not None
+
+
 def test_python2_pythonpath():
     assert 'site-packages' in python2_pythonpath() or 'dist-packages' in python2_pythonpath()
@@ -8,4 +8,7 @@ Must not be changed after GimpScriptRunner was imported.
 
 The mechanism removes the dependency on psutil during installation because it cannot 
 be guaranteed that psutil is already present in the python environment.
+
+The check waits until gimp's python interpreter is started, takes a snapshot of gimp's
+child processes and kills the remaining ones once the script has finished.
 """
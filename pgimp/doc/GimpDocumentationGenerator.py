@@ -2,8 +2,12 @@
 #
 # SPDX-License-Identifier: MIT
 
+import json
+import os
+import tempfile
 import textwrap
-from collections import OrderedDict
+from collections import OrderedDict, deque
+from typing import List, Tuple
 
 from pgimp.GimpScriptRunner import GimpScriptRunner
 from pgimp.doc.output.Output import Output
@@ -36,120 +40,224 @@ GIMP_TYPE_MAPPING = {
 See also gimp-procedural-db-proc-arg doc.
 """
 
-STANDARD_TYPES = list(range(0, 9+1))
-UNKNOWN_GIMP_CLASSES = [10, 17, 18, 21]
-KNOWN_GIMP_CLASSES = [i for i in GIMP_TYPE_MAPPING if i not in UNKNOWN_GIMP_CLASSES and i not in STANDARD_TYPES]
+STANDARD_TYPES = frozenset(range(0, 9+1))
+UNKNOWN_GIMP_CLASSES = frozenset({10, 17, 18, 21})
+KNOWN_GIMP_CLASSES = frozenset(GIMP_TYPE_MAPPING) - UNKNOWN_GIMP_CLASSES - STANDARD_TYPES
+KNOWN_GIMP_CLASS_NAMES = frozenset(GIMP_TYPE_MAPPING[i] for i in KNOWN_GIMP_CLASSES)
+UNKNOWN_GIMP_CLASS_NAMES = frozenset(GIMP_TYPE_MAPPING[i] for i in UNKNOWN_GIMP_CLASSES)
+
+INTROSPECTION_FORMAT = 1
+"""
+Increase when the introspection script changes such that cached introspections are not used anymore.
+"""
+
+INTROSPECTION_KEYS = frozenset({'pdb', 'classes', 'class_attributes', 'enums', 'gimpfu_constants'})
+
+INTROSPECTION_KEY_SCRIPT = textwrap.dedent(
+    """
+    import hashlib
+
+    import gimp
+    from pgimp.gimp.parameter import return_json
+
+    num_matches, procedure_names = pdb.gimp_procedural_db_query("", "", "", "", "", "", "")
+    return_json([
+        '.'.join(map(str, gimp.version)),
+        hashlib.sha1('\\n'.join(sorted(procedure_names)).encode('utf-8')).hexdigest(),
+    ])
+    """
+)
+"""
+Identifies an introspection by the gimp version and the installed procedures, which change with plug-ins.
+"""
+
+
+def introspection_cache_file(cache_dir: str, gimp_version: str, procedures_digest: str) -> str:
+    return os.path.join(
+        cache_dir,
+        'introspection-{:s}-{:s}-{:d}.json'.format(gimp_version, procedures_digest, INTROSPECTION_FORMAT)
+    )
+
+
+INTROSPECTION_SCRIPT = textwrap.dedent(
+    """
+    import inspect
+    from collections import OrderedDict
+
+    import gimp
+    import gimpenums
+    import gimpfu
+    from pgimp.gimp.parameter import get_json, return_json
+
+    def dump_pdb():
+        result = OrderedDict()
+
+        num_matches, procedure_names = pdb.gimp_procedural_db_query("", "", "", "", "", "", "")
+        methods = sorted(procedure_names)
+        for method in methods:
+            blurb, help, author, copyright, date, proc_type, num_args, num_values = pdb.gimp_procedural_db_proc_info(method)
+            result[method] = OrderedDict()
+            result[method]['blurb'] = blurb
+            result[method]['help'] = help
+            result[method]['args'] = OrderedDict()
+            result[method]['vals'] = OrderedDict()
+            for arg_num in range(0, num_args):
+                arg_type, arg_name, arg_desc = pdb.gimp_procedural_db_proc_arg(method, arg_num)
+                if arg_name == 'run-mode':
+                    continue
+                result[method]['args'][arg_name] = OrderedDict()
+                result[method]['args'][arg_name]['type'] = arg_type
+                result[method]['args'][arg_name]['desc'] = arg_desc
+            for val_num in range(0, num_values):
+                val_type, val_name, val_desc = pdb.gimp_procedural_db_proc_val(method, val_num)
+                result[method]['vals'][val_name] = OrderedDict()
+                result[method]['vals'][val_name]['type'] = val_type
+                result[method]['vals'][val_name]['desc'] = val_desc
+        return result
+
+    def describe(cls):
+        attrs = [a for a in dir(cls) if not a.startswith('__')]
+        return {
+            'props': [a for a in attrs if type(getattr(cls, a)).__name__ == 'getset_descriptor'],
+            'methods': [a for a in attrs if type(getattr(cls, a)).__name__ == 'method_descriptor'],
+            'baseclasses': [base.__name__ for base in cls.__bases__],
+        }
+
+    def dump_values(module, accept_name, rejected_types):
+        names = [s for s in dir(module) if not s.startswith('__') and accept_name(s)]
+        values = [(name, getattr(module, name)) for name in names]
+        return [v for v in values if type(v[1]).__name__ not in rejected_types]
+
+    classes = inspect.getmembers(gimp, inspect.isclass)
+
+    return_json({
+        'pdb': dump_pdb(),
+        'classes': [(cls[0], inspect.getmro(cls[1])[1].__name__) for cls in classes],
+        'class_attributes': dict(
+            (name, describe(getattr(gimp, name))) for name in get_json('classes') if hasattr(gimp, name)
+        ),
+        'enums': dump_values(gimpenums, lambda s: True, ['instance']),
+        'gimpfu_constants': dump_values(gimpfu, lambda s: s.isupper(), ['instance', 'function']),
+    })
+    """
+)
+"""
+Collects everything that is documented, so that gimp only has to be asked once.
+"""
 
 
 class GimpDocumentationGenerator:
-    def __init__(self, output: Output) -> None:
+    def __init__(self, output: Output, cache_dir: str = None) -> None:
+        """
+        :param output: Where to write the documentation to.
+        :param cache_dir: Directory in which gimp's introspection is cached, nothing is cached by default.
+        """
         super().__init__()
         self._output = output
-        self._gsr = GimpScriptRunner()
+        self._cache_dir = cache_dir
+        self._gsr = GimpScriptRunner(persistent=True)
         self._ordered_gimp_classes = []
 
     def __call__(self):
-        self._document_pdb_module()
-        self._output.start_classes()
-        self._document_known_gimp_classes()
-        self._document_unknown_gimp_classes()
-        self._document_gimp_enums()
-        self._document_gimpfu_constants()
-
-    def _document_known_gimp_classes(self):
-        gimp_classes = set([GIMP_TYPE_MAPPING[i] for i in KNOWN_GIMP_CLASSES])
-        ordered_gimp_classes = self._get_ordered_gimp_classes()
-        ordered_gimp_classes = [x for x in ordered_gimp_classes if x in gimp_classes]
+        with self._gsr:
+            introspection = self._cached_introspection()
+        self._ordered_gimp_classes = self._order_gimp_classes(introspection['classes'])
+
+        try:
+            self._document_pdb_module(introspection['pdb'])
+            self._output.start_classes()
+            self._document_known_gimp_classes(introspection['class_attributes'])
+            self._document_unknown_gimp_classes()
+            self._document_gimp_enums(introspection['enums'])
+            self._document_gimpfu_constants(introspection['gimpfu_constants'])
+        finally:
+            self._output.close()
+
+    def _cached_introspection(self):
+        """
+        The introspection only changes with the gimp version and the installed procedures, so it is cached per both.
+        """
+        if self._cache_dir is None:
+            return self._introspect()
+
+        cache_file = introspection_cache_file(self._cache_dir, *self._introspection_key())
+        introspection = self._read_cached_introspection(cache_file)
+        if introspection is not None:
+            return introspection
+
+        introspection = self._introspect()
+        os.makedirs(self._cache_dir, exist_ok=True)
+        fd, tmp_file = tempfile.mkstemp(dir=self._cache_dir, suffix='.json')
+        try:
+            with os.fdopen(fd, 'w') as file_handle:
+                json.dump(introspection, file_handle)
+            os.replace(tmp_file, cache_file)
+        except BaseException:
+            os.remove(tmp_file)
+            raise
+        return introspection
+
+    @staticmethod
+    def _read_cached_introspection(cache_file: str):
+        """
+        :return: None if there is no cached introspection or it cannot be read, e.g. because it is corrupt.
+        """
+        try:
+            with open(cache_file, 'r') as file_handle:
+                introspection = json.load(file_handle)
+        except (OSError, ValueError):
+            return None
+        if not isinstance(introspection, dict) or not INTROSPECTION_KEYS <= introspection.keys():
+            return None
+        return introspection
+
+    def _introspection_key(self) -> Tuple[str, str]:
+        return tuple(self._gsr.execute_and_parse_json(INTROSPECTION_KEY_SCRIPT, timeout_in_seconds=10))
+
+    def _introspect(self):
+        return self._gsr.execute_and_parse_json(
+            INTROSPECTION_SCRIPT,
+            parameters={'classes': sorted(KNOWN_GIMP_CLASS_NAMES)},
+            timeout_in_seconds=30
+        )
+
+    def _document_known_gimp_classes(self, class_attributes: dict):
+        ordered_gimp_classes = [x for x in self._ordered_gimp_classes if x in KNOWN_GIMP_CLASS_NAMES]
         for gimp_class in ordered_gimp_classes:
-            attrs = self._execute(
-                'from pgimp.gimp.parameter import return_json\n' +
-                'attrs = filter(lambda s: not s.startswith("__"), dir(gimp.{0:s}))\n'.format(gimp_class) +
-                'props = filter(lambda a: type(eval("gimp.{:s}." + a)).__name__ == "getset_descriptor", attrs)\n'.format(gimp_class) +
-                'methods = filter(lambda a: type(eval("gimp.{:s}." + a)).__name__ == "method_descriptor", attrs)\n'.format(gimp_class) +
-                'baseclasses = map(lambda cls: cls.__name__, gimp.{0:s}.__bases__)\n'.format(gimp_class) +
-                'return_json({"props": props, "methods": methods, "baseclasses": baseclasses})'
-            )
-            props = attrs['props']
-            methods = attrs['methods']
-            baseclasses = attrs['baseclasses']
-            self._output.start_class(gimp_class, baseclasses)
-            self._output.class_properties(props)
-            self._output.class_methods(methods)
-
-    def _get_ordered_gimp_classes(self):
-        if not self._ordered_gimp_classes:
-            unordered_gimp_classes = self._execute(textwrap.dedent(
-                """
-                import gimp
-                from pgimp.gimp.parameter import return_json
-                import inspect
-                classes = inspect.getmembers(gimp, inspect.isclass)
-                return_json(map(lambda cls: (cls[0], inspect.getmro(cls[1])[1].__name__), classes))
-                """
-            ))
-
-            dependencies = {}
-            for cls, parent in unordered_gimp_classes:
-                if parent not in dependencies:
-                    dependencies[parent] = []
-                dependencies[parent].append(cls)
-            visited = OrderedDict()
-            to_visit = {'object'}
-            while to_visit:
-                to_visit_new = set([])
-                for element in to_visit:
-                    visited[element] = True
-                    if element in dependencies:
-                        to_visit_new = to_visit_new.union(set(dependencies[element]))
-                to_visit = to_visit_new - set(visited)
-
-            self._ordered_gimp_classes = list(visited.keys())
-        return self._ordered_gimp_classes
+            attrs = class_attributes[gimp_class]
+            self._output.start_class(gimp_class, attrs['baseclasses'])
+            self._output.class_properties(attrs['props'])
+            self._output.class_methods(attrs['methods'])
+
+    @staticmethod
+    def _order_gimp_classes(unordered_gimp_classes: List[Tuple[str, str]]) -> List[str]:
+        """
+        Orders the classes such that base classes come before the classes that are derived from them.
+        """
+        children = {}
+        for cls, parent in unordered_gimp_classes:
+            if parent not in children:
+                children[parent] = []
+            children[parent].append(cls)
+
+        ordered_gimp_classes = []
+        to_visit = deque(['object'])
+        while to_visit:
+            element = to_visit.popleft()
+            ordered_gimp_classes.append(element)
+            to_visit.extend(children.get(element, []))
+        return ordered_gimp_classes
 
     def _document_unknown_gimp_classes(self):
-        gimp_classes = [GIMP_TYPE_MAPPING[i] for i in UNKNOWN_GIMP_CLASSES]
-        ordered_gimp_classes = self._get_ordered_gimp_classes()
-        ordered_gimp_classes = [x for x in ordered_gimp_classes if x in gimp_classes]
+        ordered_gimp_classes = [x for x in self._ordered_gimp_classes if x in UNKNOWN_GIMP_CLASS_NAMES]
         for gimp_class in ordered_gimp_classes:
             self._output.start_unknown_class(gimp_class)
 
-    def _document_pdb_module(self):
+    def _document_pdb_module(self, methods: dict):
         self._output.start_module('pdb')
-        pdb_dump = textwrap.dedent(
-            """
-            from collections import OrderedDict
-            from pgimp.gimp.parameter import return_json
-
-            result = OrderedDict()
-
-            num_matches, procedure_names = pdb.gimp_procedural_db_query("", "", "", "", "", "", "")
-            methods = sorted(procedure_names)
-            for method in methods:
-                blurb, help, author, copyright, date, proc_type, num_args, num_values = pdb.gimp_procedural_db_proc_info(method)
-                result[method] = OrderedDict()
-                result[method]['blurb'] = blurb
-                result[method]['help'] = help
-                result[method]['args'] = OrderedDict()
-                result[method]['vals'] = OrderedDict()
-                for arg_num in range(0, num_args):
-                    arg_type, arg_name, arg_desc = pdb.gimp_procedural_db_proc_arg(method, arg_num)
-                    if arg_name == 'run-mode':
-                        continue
-                    result[method]['args'][arg_name] = OrderedDict()
-                    result[method]['args'][arg_name]['type'] = arg_type
-                    result[method]['args'][arg_name]['desc'] = arg_desc
-                for val_num in range(0, num_values):
-                    val_type, val_name, val_desc = pdb.gimp_procedural_db_proc_val(method, val_num)
-                    result[method]['vals'][val_name] = OrderedDict()
-                    result[method]['vals'][val_name]['type'] = val_type
-                    result[method]['vals'][val_name]['desc'] = val_desc
-
-            return_json(result)
-            """)
-        methods = self._execute(pdb_dump, 20)
-        for method in methods.keys():
-            blurb = methods[method]['blurb']
-            help = methods[method]['help']
+        for method, info in methods.items():
+            blurb = info['blurb']
+            help = info['help']
 
             description = ''
             if blurb:
@@ -159,51 +267,21 @@ class GimpDocumentationGenerator:
             if help:
                 description += help
 
-            parameters = OrderedDict()
-            for arg_name in methods[method]['args'].keys():
-                arg_type = methods[method]['args'][arg_name]['type']
-                arg_desc = methods[method]['args'][arg_name]['desc']
-                parameters[arg_name] = (GIMP_TYPE_MAPPING[arg_type], arg_desc or '')
-
-            return_values = OrderedDict()
-            for val_name in methods[method]['vals'].keys():
-                val_type = methods[method]['vals'][val_name]['type']
-                val_desc = methods[method]['vals'][val_name]['desc']
-                return_values[val_name] = (GIMP_TYPE_MAPPING[val_type], val_desc or '')
+            parameters = OrderedDict(
+                (arg_name, (GIMP_TYPE_MAPPING[arg['type']], arg['desc'] or ''))
+                for arg_name, arg in info['args'].items()
+            )
+            return_values = OrderedDict(
+                (val_name, (GIMP_TYPE_MAPPING[val['type']], val['desc'] or ''))
+                for val_name, val in info['vals'].items()
+            )
 
             self._output.method(method, description, parameters, return_values)
 
-    def _execute(self, string: str, timeout_in_seconds: int = 10):
-        return self._gsr.execute_and_parse_json(string, timeout_in_seconds=timeout_in_seconds)
-
-    def _document_gimp_enums(self):
-        enum_dump = textwrap.dedent(
-            """
-            import gimpenums
-            from pgimp.gimp.parameter import return_json
-
-            result = filter(lambda s: not s.startswith('__'), dir(gimpenums))
-            result = zip(result, map(lambda s: eval('gimpenums.' + s), result))
-            result = filter(lambda v: type(v[1]).__name__ != 'instance', result)
-
-            return_json(result)
-            """)
-        enums = self._execute(enum_dump)
+    def _document_gimp_enums(self, enums: list):
         self._output.gimpenums(enums)
 
-    def _document_gimpfu_constants(self):
-        const_dump = textwrap.dedent(
-            """
-            import gimpfu
-            from pgimp.gimp.parameter import return_json
-
-            result = filter(lambda s: not s.startswith('__') and s.isupper(), dir(gimpfu))
-            result = zip(result, map(lambda s: eval('gimpfu.' + s), result))
-            result = filter(lambda v: type(v[1]).__name__ not in ['instance', 'function'] , result)
-
-            return_json(result)
-            """)
-        constants = self._execute(const_dump)
+    def _document_gimpfu_constants(self, constants: list):
         self._output.gimpfu_constants(constants)
 
 
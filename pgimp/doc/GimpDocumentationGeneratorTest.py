@@ -4,7 +4,7 @@
 
 import os
 
-from pgimp.doc.GimpDocumentationGenerator import GimpDocumentationGenerator
+from pgimp.doc.GimpDocumentationGenerator import GimpDocumentationGenerator, introspection_cache_file
 from pgimp.doc.output.OutputPythonSkeleton import OutputPythonSkeleton
 from pgimp.util import file
 
@@ -22,3 +22,55 @@ def test_generate_python_skeletons():
     assert_file_exists('gimp/pdb.py')
     assert_file_exists('gimpenums/__init__.py')
     assert_file_exists('gimpfu/__init__.py')
+
+
+def test_order_gimp_classes():
+    ordered_gimp_classes = GimpDocumentationGenerator._order_gimp_classes(
+        [('Layer', 'Drawable'), ('Display', 'object'), ('Drawable', 'Item'), ('Channel', 'Drawable'), ('Item', 'object')]
+    )
+
+    assert ['object', 'Display', 'Item', 'Drawable', 'Layer', 'Channel'] == ordered_gimp_classes
+
+
+INTROSPECTION = {'pdb': {}, 'classes': [], 'class_attributes': {}, 'enums': [], 'gimpfu_constants': []}
+
+
+def _generator(cache_dir: str, introspections: list) -> GimpDocumentationGenerator:
+    generator = GimpDocumentationGenerator(None, cache_dir=cache_dir)
+    generator._introspection_key = lambda: ('2.10.0', 'digest')
+
+    def introspect():
+        introspections.append(INTROSPECTION)
+        return INTROSPECTION
+    generator._introspect = introspect
+    return generator
+
+
+def test_introspection_cache_miss_introspects_and_writes_cache(tmp_path):
+    introspections = []
+
+    assert INTROSPECTION == _generator(str(tmp_path), introspections)._cached_introspection()
+
+    assert 1 == len(introspections)
+    assert os.path.exists(introspection_cache_file(str(tmp_path), '2.10.0', 'digest'))
+
+
+def test_introspection_cache_hit_does_not_introspect(tmp_path):
+    _generator(str(tmp_path), [])._cached_introspection()
+    introspections = []
+
+    assert INTROSPECTION == _generator(str(tmp_path), introspections)._cached_introspection()
+
+    assert 0 == len(introspections)
+
+
+def test_corrupt_introspection_cache_is_replaced(tmp_path):
+    cache_file = introspection_cache_file(str(tmp_path), '2.10.0', 'digest')
+    with open(cache_file, 'w') as file_handle:
+        file_handle.write('{"pdb": ')
+    introspections = []
+
+    assert INTROSPECTION == _generator(str(tmp_path), introspections)._cached_introspection()
+
+    assert 1 == len(introspections)
+    assert INTROSPECTION == _generator(str(tmp_path), [])._cached_introspection()
@@ -49,3 +49,8 @@ class Output(ABC):
     @abstractmethod
     def gimpfu_constants(self, constants: Tuple[str, Any]):
         pass
+
+    def close(self):
+        """
+        Called once the documentation is complete, e.g. to write buffered output. Does nothing by default.
+        """
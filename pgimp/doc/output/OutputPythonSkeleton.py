@@ -2,6 +2,7 @@
 #
 # SPDX-License-Identifier: MIT
 
+import io
 import os
 import textwrap
 from collections import OrderedDict
@@ -9,25 +10,27 @@ from typing import Tuple, MutableMapping, Union, List, Any
 
 from pgimp.doc.GimpDocumentationGenerator import GIMP_TYPE_MAPPING, KNOWN_GIMP_CLASSES, UNKNOWN_GIMP_CLASSES
 from pgimp.doc.output.Output import Output
-from pgimp.util import file
 
 
 def pythonify_id(identifier: str):
     return identifier.replace('-', '_')
 
 
+MODULE_HEADER = 'from typing import List, Tuple\n' + 'from gimp import ' + ', '.join(
+    [GIMP_TYPE_MAPPING[i] for i in sorted(KNOWN_GIMP_CLASSES) + sorted(UNKNOWN_GIMP_CLASSES)]
+) + '\n'
+
+
 class OutputPythonSkeleton(Output):
     def __init__(self, output_dir: str) -> None:
         super().__init__()
         self._output_dir = output_dir
-        self._current_file = None
+        self._buffers = OrderedDict()  # type: MutableMapping[str, io.StringIO]
+        self._current_buffer = None
 
     def start_module(self, name: str):
         self._add_file(name)
-        self._append('from typing import List, Tuple\n')
-        self._append('from gimp import ' + ', '.join(
-            [GIMP_TYPE_MAPPING[i] for i in KNOWN_GIMP_CLASSES + UNKNOWN_GIMP_CLASSES]
-        ) + '\n')
+        self._append(MODULE_HEADER)
 
     def method(
             self,
@@ -36,40 +39,28 @@ class OutputPythonSkeleton(Output):
             parameters: Union[MutableMapping[str, Tuple[str, str]], OrderedDict],
             return_values: Union[MutableMapping[str, Tuple[str, str]], OrderedDict],
     ):
-        signature = pythonify_id(method)
-        signature += '('
-        if parameters:
-            last_parameter = next(reversed(parameters))
-            for parameter in parameters:
-                signature += pythonify_id(parameter)
-                signature += ': ' + parameters[parameter][0]
-                if parameter != last_parameter:
-                    signature += ', '
-        signature += ')'
-        if return_values:
-            signature += ' -> '
-            last_return_value = next(reversed(return_values))
-            if len(return_values) == 1:
-                signature += return_values[last_return_value][0]
-            else:
-                signature += 'Tuple['
-                for return_value in return_values:
-                    signature += return_values[return_value][0]
-                    if return_value != last_return_value:
-                        signature += ', '
-                signature += ']'
-
-        documentation = '"""\n'
+        signature = pythonify_id(method) + '(' + ', '.join(
+            '{:s}: {:s}'.format(pythonify_id(parameter), parameter_type)
+            for parameter, (parameter_type, _) in parameters.items()
+        ) + ')'
+        if len(return_values) == 1:
+            signature += ' -> ' + next(iter(return_values.values()))[0]
+        elif return_values:
+            signature += ' -> Tuple[' + ', '.join(value_type for value_type, _ in return_values.values()) + ']'
+
+        documentation = ['"""']
         if description:
-            documentation += description + '\n'
+            documentation.append(description)
         if description and parameters:
-            documentation += '\n'
-        if parameters:
-            for parameter in parameters:
-                documentation += ':param ' + pythonify_id(parameter) + ': ' + parameters[parameter][1] + '\n'
+            documentation.append('')
+        documentation.extend(
+            ':param {:s}: {:s}'.format(pythonify_id(parameter), parameter_description)
+            for parameter, (_, parameter_description) in parameters.items()
+        )
         if return_values:
-            documentation += ':return: ' + ', '.join(list(map(pythonify_id, return_values.keys()))) + '\n'
-        documentation += '"""'
+            documentation.append(':return: ' + ', '.join(map(pythonify_id, return_values.keys())))
+        documentation.append('"""')
+        documentation = '\n'.join(documentation)
 
         result = '\n\ndef ' + signature + ':' + '\n' + textwrap.indent(documentation, '    ') + '\n' + \
                  textwrap.indent('raise NotImplementedError()', '    ') + '\n'
@@ -126,15 +117,29 @@ class OutputPythonSkeleton(Output):
 
         self._append(output)
 
+    def close(self):
+        """
+        Writes the skeleton files. Files whose content did not change are left untouched, so that their
+        modification times stay valid for editors and build tools.
+        """
+        for skeleton_file, buffer in self._buffers.items():
+            content = buffer.getvalue()
+            if os.path.exists(skeleton_file):
+                with open(skeleton_file, 'r', encoding='utf8') as file_handle:
+                    if file_handle.read() == content:
+                        continue
+            tmp_file = skeleton_file + '.tmp'
+            with open(tmp_file, 'w', encoding='utf8') as file_handle:
+                file_handle.write(content)
+            os.replace(tmp_file, skeleton_file)
+        self._buffers.clear()
+        self._current_buffer = None
+
     def _add_file(self, name: str):
         if not os.path.exists(self._output_dir):
             os.makedirs(self._output_dir)
         skeleton_file = os.path.join(self._output_dir, '{:s}.py'.format(name))
-        if os.path.exists(skeleton_file):
-            os.remove(skeleton_file)
-        file.touch(skeleton_file)
-
-        self._current_file = skeleton_file
+        self._current_buffer = self._buffers[skeleton_file] = io.StringIO()
 
     def _append(self, string: str):
-        file.append(self._current_file, string)
+        self._current_buffer.write(string)
@@ -0,0 +1,39 @@
+# Copyright 2018 Mathias Burger <mathias.burger@gmail.com>
+#
+# SPDX-License-Identifier: MIT
+
+import os
+import shutil
+from collections import OrderedDict
+from tempfile import mkdtemp
+
+from pgimp.doc.output.OutputPythonSkeleton import OutputPythonSkeleton
+
+
+def generate_skeleton(output_dir: str):
+    output = OutputPythonSkeleton(os.path.join(output_dir, 'gimp'))
+    output.start_module('pdb')
+    output.method(
+        'gimp-image-width',
+        'Return the width of the image.',
+        OrderedDict([('image', ('Image', 'The image'))]),
+        OrderedDict([('width', ('int', 'The image\'s width'))])
+    )
+    output.close()
+
+
+def test_unchanged_skeleton_is_not_rewritten():
+    output_dir = mkdtemp()
+    pdb_file = os.path.join(output_dir, 'gimp', 'pdb.py')
+
+    generate_skeleton(output_dir)
+    os.utime(pdb_file, (0, 0))
+    generate_skeleton(output_dir)
+
+    with open(pdb_file, 'r') as file_handle:
+        content = file_handle.read()
+    modification_time = os.path.getmtime(pdb_file)
+    shutil.rmtree(output_dir)
+
+    assert 'def gimp_image_width(image: Image) -> int:' in content
+    assert 0 == modification_time
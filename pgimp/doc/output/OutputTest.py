@@ -0,0 +1,38 @@
+# Copyright 2018 Mathias Burger <mathias.burger@gmail.com>
+#
+# SPDX-License-Identifier: MIT
+
+from pgimp.doc.output.Output import Output
+
+
+class OutputWithoutClose(Output):
+    def start_module(self, name):
+        pass
+
+    def method(self, method, description, parameters, return_values):
+        pass
+
+    def start_classes(self):
+        pass
+
+    def start_class(self, name, baseclasses):
+        pass
+
+    def class_properties(self, properties):
+        pass
+
+    def class_methods(self, methods):
+        pass
+
+    def start_unknown_class(self, name):
+        pass
+
+    def gimpenums(self, enum_values):
+        pass
+
+    def gimpfu_constants(self, constants):
+        pass
+
+
+def test_output_does_not_need_to_implement_close():
+    OutputWithoutClose().close()
@@ -2,12 +2,15 @@
 #
 # SPDX-License-Identifier: MIT
 
+import threading
 from typing import Callable
 
 import gimp
 
 from pgimp.gimp.parameter import get_json
 
+PREFETCH_CHUNK_SIZE = 1024 * 1024
+
 
 def open_xcf(filename):
     """
@@ -60,6 +63,33 @@ class XcfFile:
 def for_each_file(callback, save=False):
     # type: (Callable[[gimp.Image, str], None], bool) -> None
     files = get_json('__files__')
-    for file in files:
-        with XcfFile(file, save=save) as image:
+    # gimp.pdb looks procedures up in the procedural database on every attribute access
+    load, save_image, delete = gimp.pdb.gimp_xcf_load, gimp.pdb.gimp_xcf_save, gimp.pdb.gimp_image_delete
+    prefetch = None
+    for i, file in enumerate(files):
+        if prefetch is not None:
+            prefetch.join()
+        if i + 1 < len(files):
+            # reads the next file from disk while the callback processes the current one
+            prefetch = threading.Thread(target=_read_into_page_cache, args=(files[i + 1],))
+            prefetch.daemon = True
+            prefetch.start()
+        image = load(0, file, file)
+        try:
             callback(image, file)
+        finally:
+            if save:
+                save_image(0, image, None, file, file)
+            delete(image)
+
+
+def _read_into_page_cache(filename):
+    """
+    :type filename: str
+    """
+    try:
+        with open(filename, 'rb') as file_handle:
+            while file_handle.read(PREFETCH_CHUNK_SIZE):
+                pass
+    except IOError:
+        pass  # gimp reports the error when it loads the file
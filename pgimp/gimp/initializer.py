@@ -29,3 +29,11 @@ if '__PYTHONPATH__' in os.environ:
     pythonpath = os.environ['__PYTHONPATH__']
     for path_component in [x.strip() for x in pythonpath.split(':')]:
         sys.path.append(path_component)
+
+if '__ready_fd__' in os.environ:
+    try:
+        ready_fd = int(os.environ['__ready_fd__'])
+        os.write(ready_fd, b'1')
+        os.close(ready_fd)
+    except OSError:
+        pass  # the descriptor was not inherited, the runner will continue after a timeout
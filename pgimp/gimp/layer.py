@@ -9,6 +9,11 @@ import numpy as np
 import gimp
 import gimpenums
 
+STRIP_HEIGHT = 4 * 64
+"""
+Number of rows that are read at once when layers are copied into a single array, a multiple of gimp's tile size.
+"""
+
 
 class LayerException(Exception):
     pass
@@ -109,7 +114,8 @@ def merge_mask_layer(
     layer_name_dst, 
     mask_foreground_color, 
     position_dst=0, 
-    clear_selection=True
+    clear_selection=True,
+    out=None
 ):
     """
     :type image_src: gimp.Image
@@ -119,6 +125,10 @@ def merge_mask_layer(
     :type mask_foreground_color: int
     :type position_dst: int
     :type clear_selection: bool
+    :param out: Optional uint8 array of shape (height, width, bpp) that receives the merged mask, so that it can be
+                reused by callers that merge many masks of the same size. It is ignored and left untouched when its
+                shape differs from the one of the layers.
+    :type out: np.ndarray
     :rtype: gimp.Layer
     """
     if clear_selection:
@@ -138,30 +148,38 @@ def merge_mask_layer(
     layer_src = gimp.pdb.gimp_image_get_layer_by_name(image_src, layer_name_src)
     layer_dst = gimp.pdb.gimp_image_get_layer_by_name(image_dst, layer_name_dst)
 
-    if layer_src is None:
-        if mask_foreground_color == 1:  # white
-            content_src = np.zeros(shape=(image_dst.height, image_dst.width))
-        else:  # black
-            content_src = np.ones(shape=(image_dst.height, image_dst.width))*255
-    else:
-        region = layer_src.get_pixel_rgn(0, 0, layer_src.width, layer_src.height)
-        buffer = region[:, :]
-        content_src = np.frombuffer(buffer, dtype=np.uint8).reshape((layer_src.height, layer_src.width, bpp))
+    content_src = None if layer_src is None else _layer_content(layer_src, bpp)
+    content_dst = None if layer_dst is None else _layer_content(layer_dst, bpp)
 
-    if layer_dst is None:
-        if mask_foreground_color == 1:  # white
-            content_dst = np.zeros(shape=(image_dst.height, image_dst.width))
-        else:  # black
-            content_dst = np.ones(shape=(image_dst.height, image_dst.width))*255
+    if content_src is not None:
+        shape = content_src.shape
+    elif content_dst is not None:
+        shape = content_dst.shape
     else:
-        region = layer_dst.get_pixel_rgn(0, 0, layer_dst.width, layer_dst.height)
-        buffer = region[:, :]
-        content_dst = np.frombuffer(buffer, dtype=np.uint8).reshape((layer_dst.height, layer_dst.width, bpp))
-
-    if mask_foreground_color == 1:  # white
-        content_merged = np.maximum(content_src, content_dst).astype(np.uint8)
+        shape = (image_dst.height, image_dst.width, bpp)
+    if out is not None and out.shape != shape:
+        out = None
+
+    # a missing layer is filled with the background color, merging with it does not change the other layer
+    if content_src is None and content_dst is None:
+        background = 0 if mask_foreground_color == 1 else 255
+        if out is None:
+            content_merged = np.full(shape, background, dtype=np.uint8)
+        else:
+            out.fill(background)
+            content_merged = out
+    elif content_src is None:
+        content_merged = content_dst
+        if out is not None:
+            np.copyto(out, content_dst)
+    elif content_dst is None:
+        content_merged = content_src
+        if out is not None:
+            np.copyto(out, content_src)
+    elif mask_foreground_color == 1:  # white
+        content_merged = np.maximum(content_src, content_dst, out=out)
     else:  # black
-        content_merged = np.minimum(content_src, content_dst).astype(np.uint8)
+        content_merged = np.minimum(content_src, content_dst, out=out)
 
     if layer_dst is None:
         if image_src.base_type == gimpenums.RGB:  # rgb
@@ -180,11 +198,22 @@ def merge_mask_layer(
         )
         gimp.pdb.gimp_image_add_layer(image_dst, layer_dst, 0)
 
-    layer_dst.get_pixel_rgn(0, 0, layer_dst.width, layer_dst.height)[:, :] = content_merged.tobytes()
+    if content_merged is not content_dst:
+        layer_dst.get_pixel_rgn(0, 0, layer_dst.width, layer_dst.height)[:, :] = content_merged.tobytes()
     reorder_layer(image_dst, layer_dst, position_dst)
     return layer_dst
 
 
+def _layer_content(layer, bpp):
+    """
+    :type layer: gimp.Layer
+    :type bpp: int
+    :rtype: np.ndarray
+    """
+    region = layer.get_pixel_rgn(0, 0, layer.width, layer.height)
+    return np.frombuffer(region[:, :], dtype=np.uint8).reshape((layer.height, layer.width, bpp))
+
+
 def remove_layer(image, layer_name):
     """
     :type image: gimp.Image
@@ -234,7 +263,7 @@ def add_layer_from_numpy(image, numpy_file, name, width, height, type, position=
     :type visible: bool
     :rtype: gimp.Layer
     """
-    bytes = np.uint8(np.load(numpy_file)).tobytes()
+    bytes = np.load(numpy_file).astype(np.uint8, copy=False).tobytes()  # no intermediate copy for uint8 arrays
     return add_layer_from_bytes(image, bytes, name, width, height, type, position, float(opacity), mode, visible)
 
 
@@ -255,7 +284,7 @@ def add_layers_from_numpy(image, numpy_file, layer_names, width, height, type, p
     numpy_array = np.load(numpy_file)
     layers = []
     for i in range(len(numpy_array)):
-        bytes = np.uint8(numpy_array[i]).tobytes()
+        bytes = numpy_array[i].astype(np.uint8, copy=False).tobytes()
         layers.append(add_layer_from_bytes(
             image,
             bytes,
@@ -315,7 +344,23 @@ def convert_layers_to_numpy(image, layer_names):
     :type layer_names: List[str]
     :rtype: np.ndarray
     """
-    layer_list = []
+    regions = []
     for layer_name in layer_names:
-        layer_list.append(convert_layer_to_numpy(image, layer_name))
-    return np.concatenate(layer_list, axis=2)
+        layer = gimp.pdb.gimp_image_get_layer_by_name(image, layer_name)
+        regions.append((layer, layer.get_pixel_rgn(0, 0, layer.width, layer.height)))
+    if len(set((layer.height, layer.width) for layer, _ in regions)) != 1:
+        raise ValueError('At least one layer is required and all layers must have the same size')
+
+    # the layers are copied into a preallocated array instead of being concatenated, reading them in strips
+    # of tile rows keeps only a strip of a layer in memory besides the result
+    height, width = regions[0][0].height, regions[0][0].width
+    np_buffer = np.empty((height, width, sum(region.bpp for _, region in regions)), dtype=np.uint8)
+    channel = 0
+    for layer, region in regions:
+        for y in range(0, height, STRIP_HEIGHT):
+            strip_height = min(STRIP_HEIGHT, height - y)
+            np_buffer[y:y + strip_height, :, channel:channel + region.bpp] = np.frombuffer(
+                region[0:width, y:y + strip_height], dtype=np.uint8
+            ).reshape((strip_height, width, region.bpp))
+        channel += region.bpp
+    return np_buffer
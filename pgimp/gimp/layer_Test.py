@@ -0,0 +1,44 @@
+# Copyright 2018 Mathias Burger <mathias.burger@gmail.com>
+#
+# SPDX-License-Identifier: MIT
+
+import textwrap
+
+import pytest
+
+from pgimp.GimpScriptRunner import GimpScriptRunner
+
+gsr = GimpScriptRunner(persistent=True)  # shared by the tests so that gimp is only started once
+
+
+def teardown_module():
+    gsr.close()
+
+
+@pytest.mark.parametrize("layer_in_src,layer_in_dst", [
+    (True, False),
+    (False, True),
+])
+def test_merge_mask_layer_fills_out_when_only_one_layer_exists(layer_in_src, layer_in_dst):
+    out = gsr.execute_and_parse_json(textwrap.dedent(
+        """
+        import gimpenums
+        import numpy as np
+        from pgimp.gimp.layer import add_layer_from_bytes, merge_mask_layer
+        from pgimp.gimp.parameter import get_bool, return_json
+
+        image_src = pdb.gimp_image_new(2, 1, gimpenums.GRAY)
+        image_dst = pdb.gimp_image_new(2, 1, gimpenums.GRAY)
+        mask = np.array([0, 255], dtype=np.uint8).tobytes()
+        if get_bool('layer_in_src'):
+            add_layer_from_bytes(image_src, mask, 'Mask', 2, 1, gimpenums.GRAY_IMAGE)
+        if get_bool('layer_in_dst'):
+            add_layer_from_bytes(image_dst, mask, 'Mask', 2, 1, gimpenums.GRAY_IMAGE)
+
+        out = np.full((1, 2, 1), 7, dtype=np.uint8)  # stale content of a previous merge
+        merge_mask_layer(image_src, 'Mask', image_dst, 'Mask', 1, out=out)
+        return_json(out.ravel().tolist())
+        """
+    ), parameters={'layer_in_src': layer_in_src, 'layer_in_dst': layer_in_dst}, timeout_in_seconds=10)
+
+    assert [0, 255] == out
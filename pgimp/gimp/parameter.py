@@ -6,16 +6,36 @@ import json
 import os
 import sys
 
-import gimp
+from pgimp.gimp import worker
+from pgimp.gimp.worker import end_script
+
+parameters = None
+parameters_script = None
+
+
+def get_parameters():
+    """
+    The parameters of the current script. They are read from the parameter file once per script.
+
+    :rtype: dict
+    """
+    global parameters, parameters_script
+    if parameters is None or parameters_script != worker.scripts_executed:
+        parameters = {}
+        if '__parameters__' in os.environ:
+            with open(os.environ['__parameters__'], 'r') as file_handle:
+                parameters = dict((worker.native(k), worker.native(v)) for k, v in json.load(file_handle).items())
+        parameters_script = worker.scripts_executed
+    return parameters
 
 
 def get_parameter(name, default=None):
     """
     :type name: str
     """
-    if default is not None and name not in os.environ:
+    if default is not None and name not in get_parameters():
         return default
-    return os.environ[name]
+    return get_parameters()[name]
 
 
 def get_bool(name, default=None):
@@ -67,7 +87,10 @@ def get_bytes(name, default=None):
     :type default: bytes
     :rtype: bytes
     """
-    return eval(get_parameter(name, default))
+    if default is not None and name not in get_parameters():
+        return default
+    with open(get_parameter(name), 'rb') as file_handle:
+        return file_handle.read()
 
 
 def get_json(name, default=None):
@@ -84,7 +107,7 @@ def return_json(obj):
     :type obj: None or bool or int or float or str or list or dict
     """
     json.dump(obj, sys.stdout)
-    gimp.pdb.gimp_quit(0)
+    end_script()
 
 
 def return_bool(bool):
@@ -92,4 +115,4 @@ def return_bool(bool):
     :param bool: bool
     """
     print('true' if bool else 'false')
-    gimp.pdb.gimp_quit(0)
+    end_script()
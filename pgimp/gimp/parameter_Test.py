@@ -7,7 +7,11 @@ import pytest
 
 from pgimp.GimpScriptRunner import GimpScriptRunner, GimpScriptException
 
-gsr = GimpScriptRunner()
+gsr = GimpScriptRunner(persistent=True)  # shared by the tests so that gimp is only started once
+
+
+def teardown_module():
+    gsr.close()
 
 
 @pytest.mark.parametrize("test_input,expected", [
@@ -66,6 +70,29 @@ def test_get_bytes():
     assert np.all(arr == np.frombuffer(out, dtype=np.uint8))
 
 
+def test_get_bytes_larger_than_environment():
+    arr = np.random.randint(0, 256, 4 * 1024 * 1024, dtype=np.uint8)
+
+    out = gsr.execute_binary(
+        "from pgimp.gimp.parameter import *; import sys; sys.stdout.write(get_bytes('param'))",
+        parameters={'param': arr.tobytes()},
+        timeout_in_seconds=3
+    )
+
+    assert np.all(arr == np.frombuffer(out, dtype=np.uint8))
+
+
+def test_get_json_larger_than_environment():
+    files = ['/tmp/file{:d}.xcf'.format(i) for i in range(0, 100000)]
+    out = gsr.execute_and_parse_json(
+        "from pgimp.gimp.parameter import *; return_json(get_json('files'))",
+        parameters={'files': files},
+        timeout_in_seconds=3
+    )
+
+    assert files == out
+
+
 def test_get_json():
     json = {'a': 1, 'b': 1.1, 'c': [1, 2, 3], 'd': {'e': 'val'}}
     out = gsr.execute_and_parse_json(
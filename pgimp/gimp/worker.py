@@ -0,0 +1,163 @@
+# Copyright 2018 Mathias Burger <mathias.burger@gmail.com>
+#
+# SPDX-License-Identifier: MIT
+
+import json
+import os
+import struct
+import sys
+import traceback
+
+import gimp
+
+FRAME_HEADER = struct.Struct('>I')
+
+PRELOADED_MODULES = [
+    'pgimp.gimp.parameter',
+    'pgimp.gimp.file',
+    'pgimp.gimp.image',
+    'pgimp.gimp.layer',
+    'pgimp.gimp.colormap',
+]
+"""
+Imported before the worker reports that it is ready, so that scripts find them in sys.modules.
+"""
+
+serving = False
+scripts_executed = 0
+compiled_files = {}
+
+
+class ScriptEnd(BaseException):
+    """
+    Ends a script that is executed by a worker without quitting gimp.
+    """
+
+
+def end_script():
+    """
+    Ends the current script. Within a worker the next script is executed, otherwise gimp quits.
+    """
+    if serving:
+        raise ScriptEnd()
+    gimp.pdb.gimp_quit(0)
+
+
+def execute_file(filename, namespace):
+    """
+    Executes a python file. The compiled code is cached until the source changes, which pays off when
+    a worker executes the same file repeatedly. The source is compared instead of the modification time,
+    whose resolution may miss a file that is rewritten within the same second.
+
+    :type filename: str
+    :param namespace: The globals to execute the file with.
+    :type namespace: dict
+    """
+    with open(filename, 'r') as file_handle:
+        source = file_handle.read()
+    if filename not in compiled_files or compiled_files[filename][0] != source:
+        compiled_files[filename] = (source, compile(source, filename, 'exec'))
+    exec(compiled_files[filename][1], namespace)
+
+
+def serve(namespace):
+    """
+    Executes the scripts sent by a persistent GimpScriptRunner until it closes the connection.
+
+    :param namespace: The globals of gimp's python interpreter, each script is executed with a copy.
+    :type namespace: dict
+    """
+    global serving
+    requests = int(os.environ['__worker_requests__'])
+    responses = int(os.environ['__worker_responses__'])
+
+    _preload()
+    serving = True
+    try:
+        os.write(responses, b'1')
+        request = _read_request(requests)
+        while request is not None:
+            _execute(request, namespace)
+            os.write(responses, b'1')
+            request = _read_request(requests)
+    finally:
+        serving = False
+        os.close(requests)
+        os.close(responses)
+
+
+def _preload():
+    for module in PRELOADED_MODULES:
+        try:
+            __import__(module)
+        except Exception:
+            pass  # e.g. numpy is not installed for gimp's python, scripts report it when they import the module
+
+
+def _read_request(fd):
+    header = _read(fd, FRAME_HEADER.size)
+    if header is None:
+        return None
+    return json.loads(_read(fd, FRAME_HEADER.unpack(header)[0]).decode('utf-8'))
+
+
+def _read(fd, size):
+    chunks = []
+    while size > 0:
+        chunk = os.read(fd, size)
+        if not chunk:
+            return None
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b''.join(chunks)
+
+
+def _execute(request, namespace):
+    global scripts_executed
+    scripts_executed += 1
+    environment = dict((native(k), native(v)) for k, v in request['environment'].items())
+    previous_environment = dict((k, os.environ.get(k)) for k in environment)
+    os.environ.update(environment)
+
+    images_before = None if request.get('keep_images', True) else _image_ids()
+    stdout, stderr = sys.stdout, sys.stderr
+    sys.stdout = open(environment['__stdout__'], 'w' if environment['__binary__'] == 'False' else 'wb')
+    sys.stderr = open(environment['__stderr__'], 'w')
+    try:
+        exec(compile(native(request['code']), '<string>', 'exec'), dict(namespace))
+    except (ScriptEnd, SystemExit):
+        pass
+    except BaseException:
+        exc_type, exc_value, exc_traceback = sys.exc_info()
+        traceback.print_exception(exc_type, exc_value, exc_traceback.tb_next)  # without the frame of the worker
+        sys.stderr.write('__GIMP_SCRIPT_ERROR__ {:d}'.format(1))
+    finally:
+        sys.stdout.close()
+        sys.stderr.close()
+        sys.stdout, sys.stderr = stdout, stderr
+        for k, v in previous_environment.items():
+            if v is None:
+                del os.environ[k]
+            else:
+                os.environ[k] = v
+        if images_before is not None:
+            _delete_images_except(images_before)
+
+
+def _image_ids():
+    return set(image.ID for image in gimp.image_list())
+
+
+def _delete_images_except(image_ids):
+    for image in gimp.image_list():
+        if image.ID not in image_ids:
+            gimp.pdb.gimp_image_delete(image)
+
+
+def native(string):
+    """
+    Json decodes to unicode, whereas the environment and exec expect native strings.
+    """
+    if isinstance(string, str):
+        return string
+    return string.encode('utf-8')
@@ -2,6 +2,7 @@
 #
 # SPDX-License-Identifier: MIT
 
+import errno
 import os
 import tempfile
 
@@ -24,15 +25,27 @@ def shmem_dir():
 
 
 class TempFile:
-    def __init__(self, suffix='', prefix=tempfile.template) -> None:
+    def __init__(self, suffix='', prefix=tempfile.template, size: int = None) -> None:
+        """
+        :param size: Allocates the given number of bytes up front when the file is in shared memory, so that the pages
+                     are not allocated one by one while the content is written.
+        """
         self._suffix = suffix
         self._prefix = prefix
+        self._size = size
         self._file = None
         self._file_handle = None
 
     def __enter__(self):
         file = tempfile.mkstemp(suffix=self._suffix, prefix=self._prefix, dir=shmem_dir())
         self._file_handle, self._file = file
+        if self._size and use_shmem() and hasattr(os, 'posix_fallocate'):
+            try:
+                os.posix_fallocate(self._file_handle, 0, self._size)
+            except OSError as e:
+                if e.errno not in (errno.EOPNOTSUPP, errno.EINVAL):  # allocating up front is only an optimization
+                    self.__exit__(None, None, None)  # __exit__ is not called when __enter__ fails
+                    raise
         return self._file
 
     def __exit__(self, exc_type, exc_val, exc_tb):
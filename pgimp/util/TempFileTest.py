@@ -2,8 +2,11 @@
 #
 # SPDX-License-Identifier: MIT
 
+import errno
 import os
 
+import pytest
+
 from pgimp.util.TempFile import TempFile, use_shmem, shmem_dir
 
 
@@ -30,12 +33,46 @@ def test_tempfile_is_removed_on_exception():
 
 def test_memory_gets_freed_in_shm():
     if use_shmem():
+        chunk = b'x' * (1024 * 1024)
+        block_size = os.statvfs(shmem_dir()).f_frsize
         with TempFile() as f:
-            fh = open(f, 'w')
-            fh.write('x' * (100 * 1000000))  # write 100M
-            fh.close()
-            statvfs = os.statvfs(shmem_dir())
-            free_before = statvfs.f_frsize * statvfs.f_bavail / 1000000  # disk free in M
-        statvfs = os.statvfs(shmem_dir())
-        free_after = statvfs.f_frsize * statvfs.f_bavail / 1000000  # disk free in M
+            with open(f, 'wb') as file_handle:
+                for _ in range(0, 100):  # write 100M
+                    file_handle.write(chunk)
+            free_before = block_size * os.statvfs(shmem_dir()).f_bavail / 1000000  # disk free in M
+        free_after = block_size * os.statvfs(shmem_dir()).f_bavail / 1000000  # disk free in M
         assert free_after > free_before + 100*0.8  # at least 80 M more space than before
+
+
+def test_tempfile_with_size_is_allocated_in_shm():
+    if use_shmem():
+        with TempFile(size=1000000) as f:
+            assert os.stat(f).st_blocks * 512 >= 1000000
+
+
+def test_tempfile_is_removed_when_allocation_fails(monkeypatch):
+    if use_shmem():
+        allocated = []
+
+        def posix_fallocate(fd, offset, size):
+            allocated.append(fd)
+            raise OSError(errno.ENOSPC, os.strerror(errno.ENOSPC))
+        monkeypatch.setattr(os, 'posix_fallocate', posix_fallocate, raising=False)
+
+        temp_file = TempFile(size=1000000)
+        with pytest.raises(OSError):
+            with temp_file:
+                pass
+
+        assert not os.path.exists(temp_file._file)
+        with pytest.raises(OSError):
+            os.fstat(allocated[0])
+
+
+def test_tempfile_ignores_unsupported_allocation(monkeypatch):
+    def posix_fallocate(fd, offset, size):
+        raise OSError(errno.EOPNOTSUPP, os.strerror(errno.EOPNOTSUPP))
+    monkeypatch.setattr(os, 'posix_fallocate', posix_fallocate, raising=False)
+
+    with TempFile(size=1000000) as f:
+        assert os.path.exists(f)
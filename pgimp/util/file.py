@@ -2,14 +2,28 @@
 #
 # SPDX-License-Identifier: MIT
 
+import errno
 import os
 import shutil
+import sys
+
+HAS_COPY_FILE_RANGE = hasattr(os, 'copy_file_range')
+"""
+os.copy_file_range is available since python 3.8 on linux, it lets the kernel copy (or clone) the file contents.
+"""
+
+HAS_SENDFILE = hasattr(os, 'sendfile') and sys.platform.startswith('linux') and sys.version_info < (3, 8)
+"""
+Only linux supports os.sendfile with a regular file as destination. Since python 3.8 shutil.copyfile uses it itself.
+"""
+
+UNSUPPORTED_COPY_ERRORS = frozenset({errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP})
 
 
 def get_content(file: str) -> str:
-    with open(file, 'r') as file_handle:
+    with open(file, 'rb') as file_handle:
         content = file_handle.read()
-    return content
+    return content.decode('utf-8')
 
 
 def relative_to(file: str, path: str):
@@ -17,13 +31,18 @@ def relative_to(file: str, path: str):
 
 
 def touch(file: str):
-    with open(file, 'a'):
-        os.utime(file)
+    os.close(os.open(file, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o666))
+    os.utime(file)
 
 
 def append(file: str, content: str):
-    with open(file, 'a', encoding='utf8') as file_handle:
-        file_handle.write(content)
+    data = memoryview(content.encode('utf8'))
+    fd = os.open(file, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o666)
+    try:
+        while data:
+            data = data[os.write(fd, data):]
+    finally:
+        os.close(fd)
 
 
 def copy_relative(src: str, dst: str):
@@ -36,14 +55,58 @@ def copy_relative(src: str, dst: str):
     :param dst: The destination to copy to.
     :return: The destination file name.
     """
-    if os.path.isabs(dst):
-        shutil.copyfile(src, dst)
-    else:
+    if not os.path.isabs(dst):
         dst = os.path.join(os.path.dirname(src), dst)
-        shutil.copyfile(src, dst)
+    _copy_file(src, dst)
     return dst
 
 
+def _copy_file(src: str, dst: str):
+    kernel_copies = []
+    if HAS_COPY_FILE_RANGE:
+        kernel_copies.append(_copy_file_range)
+    if HAS_SENDFILE:
+        kernel_copies.append(_sendfile)
+
+    for kernel_copy in kernel_copies:
+        try:
+            _copy_in_kernel(src, dst, kernel_copy)
+            return
+        except OSError as e:
+            if e.errno not in UNSUPPORTED_COPY_ERRORS:
+                raise
+    shutil.copyfile(src, dst)
+
+
+def _copy_file_range(in_fd: int, out_fd: int, offset: int, count: int) -> int:
+    return os.copy_file_range(in_fd, out_fd, count, offset, offset)
+
+
+def _sendfile(in_fd: int, out_fd: int, offset: int, count: int) -> int:
+    return os.sendfile(out_fd, in_fd, offset, count)
+
+
+def _copy_in_kernel(src: str, dst: str, kernel_copy):
+    if os.path.exists(dst) and os.path.samefile(src, dst):
+        # opening dst would truncate src
+        raise shutil.SameFileError('{!r} and {!r} are the same file'.format(src, dst))
+    in_fd = os.open(src, os.O_RDONLY)
+    try:
+        out_fd = os.open(dst, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o666)
+        try:
+            size = os.fstat(in_fd).st_size
+            offset = 0
+            while offset < size:
+                copied = kernel_copy(in_fd, out_fd, offset, size - offset)
+                if copied == 0:
+                    break
+                offset += copied
+        finally:
+            os.close(out_fd)
+    finally:
+        os.close(in_fd)
+
+
 def read(file, mode='r'):
     fh = open(file, mode)
     content = fh.read()
@@ -3,10 +3,13 @@
 # SPDX-License-Identifier: MIT
 
 import os
+import shutil
 import tempfile
 
+import pytest
+
 from pgimp.util.TempFile import TempFile
-from pgimp.util.file import copy_relative, relative_to, read
+from pgimp.util.file import copy_relative, relative_to, read, get_content, touch, append
 
 
 def test_copy_with_filename_only():
@@ -50,3 +53,55 @@ def test_read():
         fh.write(content)
         assert read(tmp) == content
 
+
+def test_copy_preserves_content():
+    content = bytes(range(0, 256)) * 4096
+    with TempFile() as src, TempFile() as dst:
+        with open(src, 'wb') as file_handle:
+            file_handle.write(content)
+
+        copy_relative(src, dst)
+
+        assert read(dst, 'rb') == content
+
+
+def test_copy_to_same_file_keeps_content(tmp_path):
+    src = str(tmp_path / 'file')
+    with open(src, 'w') as file_handle:
+        file_handle.write('hello world')
+
+    with pytest.raises(shutil.SameFileError):
+        copy_relative(src, 'file')
+
+    assert read(src) == 'hello world'
+
+
+def test_get_content():
+    content = 'äbc\n' * 100000
+    with TempFile() as tmp:
+        with open(tmp, 'w', encoding='utf-8') as file_handle:
+            file_handle.write(content)
+        assert get_content(tmp) == content
+
+
+def test_touch(tmp_path):
+    tmp = str(tmp_path / 'file')
+
+    touch(tmp)
+    assert os.path.exists(tmp)
+
+    with open(tmp, 'w') as file_handle:
+        file_handle.write('abc')
+    os.utime(tmp, (0, 0))
+    touch(tmp)
+    assert os.stat(tmp).st_mtime > 0
+    assert read(tmp) == 'abc'
+
+
+def test_append(tmp_path):
+    tmp = str(tmp_path / 'file')
+
+    append(tmp, 'ä')
+    append(tmp, 'bc' * 100000)
+
+    assert get_content(tmp) == 'ä' + 'bc' * 100000
@@ -23,17 +23,16 @@ def check_python2_installation():
     proc = subprocess.Popen(
         [python],
         stdin=subprocess.PIPE,
-        stdout=subprocess.PIPE,
+        stdout=subprocess.DEVNULL,
         stderr=subprocess.PIPE,
     )
 
     requirements = PYTHON2_REQUIREMENTS
-    import_statements = list(map(lambda r: 'import ' + r, requirements))
-    stdout, stderr = proc.communicate(
-        '\n'.join(import_statements).encode(),
+    _, stderr = proc.communicate(
+        '\n'.join('import ' + requirement for requirement in requirements).encode(),
         timeout=5
     )
-    if stderr.decode() != '':
+    if stderr:
         raise GimpInstallationException(
             'At least one of the following packages is missing in the python2 installation: ' + ', '.join(requirements)
         )
@@ -64,6 +63,9 @@ class GimpDocumentationGeneratorCommand(build_py):
 with open("README.md", "r") as fh:
     long_description = fh.read()
 
+with open("requirements.txt", "r") as fh:
+    install_requires = [line.strip() for line in fh if line.strip()]
+
 setup(
     name=PROJECT,
     version=__version__,
@@ -77,7 +79,7 @@ setup(
     keywords='pgimp, gimp, annotating, annotation, machine-learning, graphics',
     packages=find_packages(),
     zip_safe=False,
-    install_requires=list(filter(None, open('requirements.txt').read().split('\n'))),
+    install_requires=install_requires,
     classifiers=[
         "Programming Language :: Python :: 3.6",
         "License :: OSI Approved :: MIT License",